@@ -1,5 +1,5 @@
 from pydoc import text
-from flask import Flask, render_template_string, request, stream_with_context, Response, jsonify
+from flask import Flask, render_template, request, stream_with_context, Response, make_response, jsonify
 import pandas as pd
 import numpy as np
 from tensorflow.keras.models import load_model
@@ -9,9 +9,12 @@ import re
 import pdfplumber
 import os
 from werkzeug.utils import secure_filename
-import ollama
 import requests
 import json
+import orjson
+import secrets
+import threading
+from cachetools import TTLCache
 
 
 # ==========================
@@ -27,7 +30,7 @@ def stream_from_ollama(prompt, model="llama3:latest"):
     with requests.post(url, json=payload, stream=True) as r:
         for line in r.iter_lines():
             if line:
-                data = json.loads(line.decode("utf-8"))
+                data = orjson.loads(line)  # parses the raw bytes, no decode step
                 if "response" in data:
                     yield data["response"]  # stream each token
                 if data.get("done", False):
@@ -45,6 +48,11 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prompts waiting for /stream_recommendation, one per upload, dropped after PROMPT_TTL seconds
+PROMPT_TTL = 300
+prompt_store = TTLCache(maxsize=1024, ttl=PROMPT_TTL)
+prompt_store_lock = threading.Lock()  # TTLCache is not thread-safe
+
 # ==========================
 # Load Pre-trained Model and Preprocessor
 # ==========================
@@ -73,30 +81,31 @@ def allowed_file(filename):
 def home():
     result, color, explanation, error = None, None, None, None
     diagnosis = {}
+    prompt_id = None
 
     if request.method == "POST":
         if 'file' not in request.files:
             error = "No file part"
-            return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
 
         file = request.files['file']
         if file.filename == '':
             error = "No selected file"
-            return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
 
         heart_disease = request.form.get('heart_disease')
         smoking_history = request.form.get('smoking_history')
 
         if not heart_disease or not smoking_history:
             error = "Please select options for Heart Disease and Smoking History."
-            return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
 
         if file and allowed_file(file.filename):
             file.seek(0, 2)
             file_size = file.tell()
             if file_size > app.config['MAX_CONTENT_LENGTH']:
                 error = "File too large. Maximum size is 10MB."
-                return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+                return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
             file.seek(0)  # Reset file pointer
 
             filename = secure_filename(file.filename)
@@ -107,16 +116,17 @@ def home():
 
             try:
                 # Extract text from PDF
-                text = ''
+                parts = []
                 with pdfplumber.open(file_path) as pdf:
                     for page in pdf.pages:
                         page_text = page.extract_text()
                         if page_text:
-                            text += page_text + '\n'
+                            parts.append(page_text)
+                text = '\n'.join(parts)
 
                 if not text.strip():
                     error = "No text found in the PDF."
-                    return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+                    return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
 
                 # Add user inputs to diagnosis
                 diagnosis['heart_disease'] = {
@@ -203,12 +213,12 @@ def home():
                     specimen_category = 'Random'  # Default to Random per request
 
                 # Parse blood glucose
-                glucose_matches = re.findall(
+                glucose_match = re.search(
                     r'(fasting|random)?\s*(?:glucose|blood sugar|fasting blood glucose|fbs|random blood glucose|rbs)\s*[:=]?\s*(\d+\.?\d*)\s*(mmol/l|mmol/L|mg/dl|mg/dL)?',
                     text, re.IGNORECASE
                 )
-                if glucose_matches:
-                    glucose_context, glucose_str, unit_str = glucose_matches[0]
+                if glucose_match:
+                    glucose_context, glucose_str, unit_str = glucose_match.groups()
                     original_value = float(glucose_str)
                     original_unit = unit_str.lower() if unit_str else 'mmol/l'  # Default to mmol/L
 
@@ -258,12 +268,12 @@ def home():
                             diagnosis['glucose']['color'] = 'red'
 
                 # Parse HbA1c
-                hba1c_matches = re.findall(
+                hba1c_match = re.search(
                     r'(?:hba1c|a1c|glycosylated hemoglobin)\s*[:=]?\s*(\d+\.?\d*)\s*(%|mmol/mol|mmol/MOL)?',
                     text, re.IGNORECASE
                 )
-                if hba1c_matches:
-                    hba1c_str, unit_str = hba1c_matches[0]
+                if hba1c_match:
+                    hba1c_str, unit_str = hba1c_match.groups()
                     original_value = float(hba1c_str)
                     original_unit = unit_str.lower() if unit_str else '%'  # Default to %
 
@@ -296,7 +306,7 @@ def home():
                 missing = [field for field in required_fields if field not in diagnosis]
                 if missing:
                     error = f"Missing required data in the report for prediction: {', '.join(missing)}. Please ensure the PDF contains age, gender, BMI, blood pressure, blood glucose level, and HbA1c level."
-                    return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+                    return render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
 
                 # Prepare input for model
                 gender = diagnosis['sex']['value']
@@ -325,7 +335,7 @@ def home():
                 logger.debug(f"Preprocessed input shape: {input_preprocessed.shape}")
 
                 # Predict
-                sample_pred_proba = model.predict(input_preprocessed, verbose=0)
+                sample_pred_proba = model(np.asarray(input_preprocessed, dtype=np.float32), training=False).numpy()
                 sample_pred = (sample_pred_proba > 0.5).astype(int)[0]
                 prob = sample_pred_proba[0][0] * 100
                 risk = "Diabetes" if sample_pred == 1 else "Normal"
@@ -349,9 +359,8 @@ def home():
         else:
             error = "Invalid file type. Please upload a PDF."
 
-        # Save for streaming later
-        global latest_prompt
-        latest_prompt = f"""
+        # Save for streaming later, keyed by an id the browser keeps in a cookie
+        prompt = f"""
             You are a medical assistant AI. Analyze the following patient data and provide a clear explanation + lifestyle recommendations in simple language.
 
         Patient Information:
@@ -368,8 +377,14 @@ def home():
 
         Based on Malaysian clinical guidelines, explain the risk status and give personalized health advice.
         """
+        prompt_id = secrets.token_urlsafe(16)
+        with prompt_store_lock:
+            prompt_store[prompt_id] = prompt
 
-    return render_template_string("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+    response = make_response(render_template("index.html", result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis))
+    if prompt_id:
+        response.set_cookie('prompt_id', prompt_id, max_age=PROMPT_TTL, httponly=True, samesite='Lax')
+    return response
 
 @app.route("/analyze", methods=["POST"])
 def analyze():
@@ -404,11 +419,13 @@ def analyze():
         text = ""
         try:
             # --- Extract text from PDF ---
+            parts = []
             with pdfplumber.open(file_path) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n"
+                        parts.append(page_text)
+            text = "\n".join(parts)
             if not text.strip():
                 response["error"] = "No text found in the PDF."
                 logger.warning(f"No text extracted from PDF: {filename}")
@@ -490,7 +507,7 @@ def analyze():
 
             # --- Preprocess & Predict ---
             input_preprocessed = preprocessor.transform(input_df)
-            pred_proba = model.predict(input_preprocessed, verbose=0)[0][0]
+            pred_proba = model(np.asarray(input_preprocessed, dtype=np.float32), training=False).numpy()[0][0]
             pred_label = 1 if pred_proba > 0.5 else 0
 
             risk = "Diabetes" if pred_label else "Normal"
@@ -527,21 +544,20 @@ def analyze():
 
 @app.route('/stream_recommendation')
 def stream_recommendation():
+    prompt = None
+    prompt_id = request.cookies.get('prompt_id')
+    if prompt_id:
+        with prompt_store_lock:
+            prompt = prompt_store.pop(prompt_id, None)
+
     def generate():
-        global latest_prompt
-        if not latest_prompt:
+        if not prompt:
             yield f"data: {json.dumps({'type': 'error', 'text': 'No prompt available. Please upload a report first.'})}\n\n"
             return
 
         try:
-            for chunk in ollama.chat(
-                model="llama3", 
-                messages=[{"role": "user", "content": latest_prompt}],
-                stream=True,
-            ):
-                if "message" in chunk and "content" in chunk["message"]:
-                    word = chunk["message"]["content"]
-                    yield f"data: {json.dumps({'type': 'result', 'text': word})}\n\n"
+            for word in stream_from_ollama(prompt, model="llama3"):
+                yield f"data: {json.dumps({'type': 'result', 'text': word})}\n\n"
 
             # End of stream
             yield f"data: {json.dumps({'type': 'end'})}\n\n"
@@ -0,0 +1,14 @@
+from PIL import Image
+
+# The kiosk shows the logo at 180px wide; keep 2x for high-DPI screens
+WIDTH = 360
+
+logo = Image.open('mycaring_logo.png')
+height = round(logo.height * WIDTH / logo.width)
+logo = logo.resize((WIDTH, height), Image.LANCZOS)
+
+logo.save('static/mycaring_logo.avif', quality=80)
+logo.save('static/mycaring_logo.webp', quality=80)
+logo.save('static/mycaring_logo.png', optimize=True)
+
+print(f"Wrote static/mycaring_logo.{{avif,webp,png}} ({WIDTH}x{height})")
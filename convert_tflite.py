@@ -0,0 +1,16 @@
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+# Load the trained ANN
+model = load_model('diabetes_ann_model.h5')
+
+# Convert to TFLite with FP16 weights (halves weight size, runs on the XNNPACK CPU kernels)
+converter = tf.lite.TFLiteConverter.from_keras_model(model)
+converter.optimizations = [tf.lite.Optimize.DEFAULT]
+converter.target_spec.supported_types = [tf.float16]
+tflite_model = converter.convert()
+
+with open('diabetes_ann_model.tflite', 'wb') as f:
+    f.write(tflite_model)
+
+print(f"Wrote diabetes_ann_model.tflite ({len(tflite_model)} bytes)")
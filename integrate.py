@@ -1,21 +1,143 @@
-from flask import Flask, render_template_string, request, stream_with_context, Response
+from flask import Flask, render_template, request, stream_with_context, Response, make_response
 import pandas as pd
 import numpy as np
-from tensorflow.keras.models import load_model
 import joblib
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 import logging
 import re
 import pdfplumber
+import pypdfium2 as pdfium
 import os
-from werkzeug.utils import secure_filename
-import ollama
+import multiprocessing
+import io
+from werkzeug.exceptions import RequestEntityTooLarge
+from flask_compress import Compress
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import orjson
+import threading
+import queue
+import time
+import secrets
+import hashlib
+from bisect import bisect_right
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cachetools import TTLCache, LRUCache
+
+
+# ==========================
+# Report Parsing Patterns
+# ==========================
+# One alternation per report field; the outer group name tells finditer which field matched.
+# Every field starts with a keyword and no two quantifiers compete for the same characters
+# (_SEP instead of \s*[:=]?\s*, _NUM instead of \d+\.?\d*), so a failed attempt gives up in
+# linear time; a long run of whitespace used to cost seconds of backtracking.
+# Patterns are written in lowercase and matched against lowercased text, which keeps sre
+# off its case-folding path; every captured value is case-normalised downstream anyway.
+_SEP = r'\s*(?:[:=]\s*)?'
+_NUM = r'\d+(?:\.\d*)?'
+_REPORT_FIELDS_RE = re.compile(
+    rf'(?P<age>age{_SEP}(?P<age_value>{_NUM}))'
+    rf'|(?P<sex>(?:sex|gender){_SEP}(?P<sex_value>male|female|m|f))'
+    rf'|(?P<bmi>(?:bmi|body mass index){_SEP}(?P<bmi_value>{_NUM}))'
+    rf'|(?P<bp>blood pressure{_SEP}(?P<systolic>\d+)\s*/\s*(?P<diastolic>\d+)\s*mmhg)'
+    rf'|(?P<specimen>(?:specimen type|fasting|normal){_SEP}(?P<specimen_value>fasting|random|normal))'
+    rf'|(?P<glucose>(?:(?P<glucose_context>fasting|random)\s*)?(?:glucose|blood sugar|fasting blood glucose|fbs|random blood glucose|rbs){_SEP}(?P<glucose_value>{_NUM})\s*(?P<glucose_unit>mmol/l|mg/dl)?)'
+    rf'|(?P<hba1c>(?:hba1c|a1c|glycosylated hemoglobin){_SEP}(?P<hba1c_value>{_NUM})\s*(?P<hba1c_unit>%|mmol/mol)?)'
+)
+_REPORT_FIELD_NAMES = ('age', 'sex', 'bmi', 'bp', 'specimen', 'glucose', 'hba1c')
+
+def scan_report_fields(text):
+    """
+    Single pass over the report text, keeping the first match for each field.
+    """
+    fields = {}
+    for match in _REPORT_FIELDS_RE.finditer(text.lower()):
+        fields.setdefault(match.lastgroup, match)
+        if len(fields) == len(_REPORT_FIELD_NAMES):
+            break
+    return fields
+
+
+# ==========================
+# Vital Classification
+# ==========================
+# (status, color) pairs shared by every request; the classify_* helpers only pick one.
+# Each *_BINS tuple holds the lower bound of every class after the first, so
+# bisect_right(bins, value) is the index of the matching class.
+BMI_BINS = (18.5, 25.0, 30.0, 35.0, 40.0)
+BP_SYSTOLIC_BINS = (120, 140, 160)
+BP_DIASTOLIC_BINS = (80, 90, 100)
+FASTING_GLUCOSE_BINS = (3.9, 6.1, 7.0)
+RANDOM_GLUCOSE_BINS = (3.9, 7.8, 11.1)
+HBA1C_BINS = (5.7, 6.3)
+RISK_BINS = (30.0, 70.0)
+
+BMI_CLASSES = (
+    ('Underweight', 'orange'),
+    ('Normal', 'green'),
+    ('Pre-obese', 'orange'),
+    ('Obese class I', 'red'),
+    ('Obese class II', 'red'),
+    ('Obese class III', 'red'),
+)
+BP_CLASSES = (
+    ('Normal', 'green'),
+    ('Elevated/Prehypertension', 'orange'),
+    ('Hypertension Stage 1', 'red'),
+    ('Hypertension Stage 2', 'red'),
+)
+GLUCOSE_CLASSES = (
+    ('Hypoglycemia', 'red'),
+    ('Normal', 'green'),
+    ('Prediabetes', 'orange'),
+    ('Diabetes', 'red'),
+)
+HBA1C_CLASSES = (
+    ('Normal', 'green'),
+    ('Prediabetes', 'orange'),
+    ('Diabetes', 'red'),
+)
+# Result card level for the predicted probability (%), same cut-offs as the confidence chart
+RISK_LEVELS = ('low', 'medium', 'high')
+
+def classify_bmi(bmi_value):
+    return BMI_CLASSES[bisect_right(BMI_BINS, bmi_value)]
+
+def classify_bp(systolic, diastolic):
+    """
+    The higher of the systolic and diastolic categories wins.
+    """
+    return BP_CLASSES[max(bisect_right(BP_SYSTOLIC_BINS, systolic), bisect_right(BP_DIASTOLIC_BINS, diastolic))]
+
+def classify_glucose(glucose_value_mmol, category):
+    """
+    Fasting thresholds for 'Fasting' specimens, random thresholds otherwise.
+    """
+    bins = FASTING_GLUCOSE_BINS if category == 'Fasting' else RANDOM_GLUCOSE_BINS
+    return GLUCOSE_CLASSES[bisect_right(bins, glucose_value_mmol)]
+
+def classify_hba1c(hba1c_value_percent):
+    return HBA1C_CLASSES[bisect_right(HBA1C_BINS, hba1c_value_percent)]
+
+def classify_risk(diabetes_prob):
+    return RISK_LEVELS[bisect_right(RISK_BINS, diabetes_prob)]
 
 
 # ==========================
 # Ollama Streaming Integration
 # ==========================
+# One keep-alive connection pool for every prompt instead of a new socket per request.
+# Each open /stream_recommendation holds a connection for the whole generation, and
+# Ollama only runs OLLAMA_NUM_PARALLEL (default 4) of them at once; pool_block makes
+# extra streams wait for a free connection instead of opening one that is thrown away.
+OLLAMA_MAX_STREAMS = 4
+ollama_session = requests.Session()
+ollama_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_MAX_STREAMS, pool_block=True))
+
 def stream_from_ollama(prompt, model="llama3:latest"):
     """
     Generator that streams tokens from Ollama API.
@@ -23,47 +145,319 @@ def stream_from_ollama(prompt, model="llama3:latest"):
     url = "http://localhost:11434/api/generate"
     payload = {"model": model, "prompt": prompt, "stream": True}
 
-    with requests.post(url, json=payload, stream=True) as r:
+    with ollama_session.post(url, json=payload, stream=True) as r:
+        r.raise_for_status()
         for line in r.iter_lines():
             if line:
-                data = json.loads(line.decode("utf-8"))
+                data = orjson.loads(line)  # parses the raw bytes, no decode step
                 if "response" in data:
                     yield data["response"]  # stream each token
                 if data.get("done", False):
                     break
 
+def with_keepalive(tokens, interval=15, window=0.04, max_tokens=8):
+    """
+    Read tokens on a background thread and yield them joined into frames, or None after every
+    `interval` seconds without one, so the caller can keep an idle connection alive while the
+    model is thinking. A frame is sent `window` seconds after its first token arrived, or as
+    soon as it holds max_tokens, so pauses in the model never hold back text already received.
+    """
+    items = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def pump():
+        try:
+            for token in tokens:
+                if stop.is_set():
+                    break
+                items.put(token)
+        except Exception as e:
+            items.put(e)
+        finally:
+            tokens.close()
+            items.put(done)
+
+    threading.Thread(target=pump, daemon=True).start()
+    buf = []
+    flush_at = None
+    try:
+        while True:
+            timeout = max(flush_at - time.monotonic(), 0) if buf else interval
+            try:
+                item = items.get(timeout=timeout)
+            except queue.Empty:
+                if buf:
+                    yield ''.join(buf)
+                    buf = []
+                else:
+                    yield None
+                continue
+            if item is done or isinstance(item, Exception):
+                if buf:
+                    yield ''.join(buf)
+                if isinstance(item, Exception):
+                    raise item
+                return
+            if not buf:
+                flush_at = time.monotonic() + window
+            buf.append(item)
+            if len(buf) >= max_tokens:
+                yield ''.join(buf)
+                buf = []
+    finally:
+        stop.set()  # the client went away or the stream ended; let pump() close the Ollama request
+
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'Uploads'
 app.config['ALLOWED_EXTENSIONS'] = {'pdf'}
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB max file size
 
-# Create upload folder if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Set up logging to capture errors
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Brotli/gzip for the page and stylesheet only; text/event-stream is left off the
+# list so /stream_recommendation is never buffered by the compressor
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+# Static files are streamed, and flask-compress picks from a separate list for
+# those whose default leaves out gzip
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+Compress(app)
+
+# Set up logging to capture errors; LOG_LEVEL=DEBUG brings back the per-request details
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prompts waiting for /stream_recommendation, one per upload, dropped after PROMPT_TTL seconds
+PROMPT_TTL = 300
+prompt_store = TTLCache(maxsize=1024, ttl=PROMPT_TTL)
+prompt_store_lock = threading.Lock()  # TTLCache is not thread-safe
+
 # ==========================
 # Load Pre-trained Model and Preprocessor
 # ==========================
-try:
-    model = load_model('diabetes_ann_model.h5')  # Load the trained ANN
-    logger.info("Model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load model: {str(e)}")
-    raise
-
-try:
-    preprocessor = joblib.load('preprocessor.joblib')  # Load the preprocessor
-    logger.info("Preprocessor loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load preprocessor: {str(e)}")
-    raise
+# TensorFlow is imported on the first prediction rather than at startup, so the PDF worker
+# processes and requests that never reach the model don't pay for it
+@lru_cache(maxsize=1)
+def get_predictor():
+    """
+    Build the single-row predictor once: the FP16 TFLite model when present, else the Keras model.
+    """
+    if os.path.exists('diabetes_ann_model.tflite'):
+        try:
+            try:
+                from ai_edge_litert.interpreter import Interpreter  # standalone runtime, no TensorFlow import
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+            interpreter = Interpreter(model_path='diabetes_ann_model.tflite')
+            interpreter.allocate_tensors()
+            input_index = interpreter.get_input_details()[0]['index']
+            output_index = interpreter.get_output_details()[0]['index']
+            lock = threading.Lock()  # the interpreter is not thread-safe
+            logger.info("TFLite model loaded successfully")
+
+            def predict(features):
+                with lock:
+                    interpreter.set_tensor(input_index, features)
+                    interpreter.invoke()
+                    return interpreter.get_tensor(output_index).copy()
+            return predict
+        except Exception as e:
+            logger.warning(f"Failed to load TFLite model, using Keras model: {str(e)}")
+
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+    try:
+        model = load_model('diabetes_ann_model.h5')  # Load the trained ANN
+        logger.info("Model loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load model: {str(e)}")
+        raise
+
+    # Single traced graph for inference; model.predict() spins up its batching loop on every call
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, model.input_shape[-1]), dtype=tf.float32)])
+    def predict_graph(x):
+        return model(x, training=False)
+
+    # Trace now, while the model is being loaded, rather than inside the first prediction
+    predict_graph(tf.zeros((1, model.input_shape[-1]), dtype=tf.float32))
+
+    return lambda features: predict_graph(tf.constant(features)).numpy()
+
+def predict_proba(features):
+    """
+    Diabetes probability for a single preprocessed row, shape (1, 1).
+    """
+    return get_predictor()(np.asarray(features, dtype=np.float32))
+
+# ==========================
+# Inline Feature Encoding
+# ==========================
+def build_encoder_steps(preprocessor):
+    """
+    Copy the fitted scaler/one-hot parameters out of the ColumnTransformer so one row can be
+    written straight into a float32 vector. Returns (steps, width), or (None, 0) if it
+    contains anything else.
+    """
+    steps = []
+    offset = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop':
+            continue
+        if isinstance(transformer, StandardScaler):
+            mean = transformer.mean_ if transformer.with_mean else 0.0
+            scale = transformer.scale_ if transformer.with_std else 1.0
+            steps.append(('num', list(columns), (slice(offset, offset + len(columns)), mean, scale)))
+            offset += len(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            lookups = []
+            for i, categories in enumerate(transformer.categories_):
+                drop = transformer.drop_idx_[i] if transformer.drop_idx_ is not None else None
+                # Output slot of each category; the dropped category sets no slot
+                lookup = {}
+                for j, category in enumerate(categories):
+                    if j == drop:
+                        lookup[category] = None
+                    else:
+                        lookup[category] = offset + (j if drop is None or j < drop else j - 1)
+                lookups.append(lookup)
+                offset += len(categories) - (1 if drop is not None else 0)
+            steps.append(('cat', list(columns), lookups))
+        else:
+            return None, 0
+    return steps, offset
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """
+    Load the preprocessor on first use; returns (preprocessor, steps, width).
+    """
+    try:
+        preprocessor = joblib.load('preprocessor.joblib')  # Load the preprocessor
+        logger.info("Preprocessor loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load preprocessor: {str(e)}")
+        raise
+
+    encoder_steps, encoded_width = build_encoder_steps(preprocessor)
+    if encoder_steps is None:
+        logger.warning("Preprocessor has unsupported steps; using preprocessor.transform for every request")
+    return preprocessor, encoder_steps, encoded_width
+
+def encode_features(record):
+    """
+    Encode one record (column -> value) exactly like preprocessor.transform would.
+    """
+    preprocessor, encoder_steps, encoded_width = get_encoder()
+    if encoder_steps is None:
+        return preprocessor.transform(pd.DataFrame([record])).astype(np.float32)
+
+    x = np.zeros((1, encoded_width), dtype=np.float32)
+    for kind, columns, params in encoder_steps:
+        if kind == 'num':
+            slots, mean, scale = params
+            x[0, slots] = (np.array([record[column] for column in columns], dtype=np.float64) - mean) / scale
+        else:
+            for column, lookup in zip(columns, params):
+                if record[column] not in lookup:
+                    raise ValueError(f"Found unknown categories ['{record[column]}'] in column '{column}' during transform")
+                slot = lookup[record[column]]
+                if slot is not None:
+                    x[0, slot] = 1.0
+    return x
+
+@lru_cache(maxsize=1024)
+def predict_record(record_items):
+    """
+    Diabetes probability (0-1) for a record given as (column, value) pairs, so a re-uploaded
+    report with the same answers reuses the earlier prediction.
+    """
+    return float(predict_proba(encode_features(dict(record_items)))[0][0])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+# ==========================
+# PDF Text Extraction
+# ==========================
+def join_report_pages(page_texts):
+    """
+    Join page texts, stopping at the first page by which every report field has been seen.
+    """
+    parts = []
+    needed = set(_REPORT_FIELD_NAMES)
+    for page_text in page_texts:
+        if not page_text:
+            continue
+        parts.append(page_text)
+        for match in _REPORT_FIELDS_RE.finditer(page_text.lower()):
+            needed.discard(match.lastgroup)
+        if not needed:
+            break
+    return '\n'.join(parts)
+
+def extract_pdf_text(pdf_bytes):
+    """
+    Extract plain text with pdfium, falling back to pdfplumber for files pdfium can't open.
+    Pages are extracted lazily, so pages after the last needed field are never parsed.
+    """
+    try:
+        pdf = pdfium.PdfDocument(pdf_bytes)
+    except pdfium.PdfiumError as e:
+        logger.warning(f"pdfium could not open PDF, falling back to pdfplumber: {str(e)}")
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            return join_report_pages(page.extract_text() for page in pdf.pages)
+
+    try:
+        return join_report_pages(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+
+# PDF parsing is CPU-bound and pdfium is not thread-safe, so it runs in worker
+# processes; the request thread only waits on the result. Workers are started from a
+# fork server (or spawned) rather than forked from the threaded web server.
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+pdf_mp_context = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+pdf_pool = None  # created on first use, so worker processes importing this module don't build one
+pdf_pool_lock = threading.Lock()
+
+def extract_in_pool(pdf_bytes):
+    """
+    Run extract_pdf_text in a worker, replacing the pool and retrying once if a worker died.
+    """
+    global pdf_pool
+    with pdf_pool_lock:
+        if pdf_pool is None:
+            pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=pdf_mp_context)
+        pool = pdf_pool
+    try:
+        return pool.submit(extract_pdf_text, pdf_bytes).result()
+    except BrokenProcessPool:
+        logger.warning("PDF worker pool is broken; starting a new one")
+        with pdf_pool_lock:
+            if pdf_pool is pool:  # another request may already have replaced it
+                pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=pdf_mp_context)
+                pool.shutdown(wait=False)
+        return pdf_pool.submit(extract_pdf_text, pdf_bytes).result()
+
+# Extracted text of recently uploaded PDFs, so re-submitting the same report skips parsing
+pdf_text_cache = LRUCache(maxsize=256)
+pdf_text_cache_lock = threading.Lock()
+
+def get_pdf_text(pdf_bytes):
+    """
+    Text of the uploaded PDF, looked up by a BLAKE2b digest of its bytes before parsing.
+    """
+    key = hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+    with pdf_text_cache_lock:
+        text = pdf_text_cache.get(key)
+    if text is None:
+        text = extract_in_pool(pdf_bytes)
+        with pdf_text_cache_lock:
+            pdf_text_cache[key] = text
+    return text
+
 # ==========================
 # Web UI
 # ==========================
@@ -71,8 +465,14 @@ html_page = """
 <!DOCTYPE html>
 <html>
 <head>
+    <meta charset="utf-8">
     <title>Universiti Malaya Diabetes Risk Kiosk from Clinical Report</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.3/dist/chart.umd.min.js"></script>
+    {% if result %}
+    <!-- Result pages load Chart.js from the CDN; open the connection while the page is parsed -->
+    <link rel="preconnect" href="https://cdn.jsdelivr.net">
+    <link rel="dns-prefetch" href="https://cdn.jsdelivr.net">
+    {% endif %}
+    <!-- Above-the-fold rules are inlined; the rest of the stylesheet loads without blocking first paint -->
     <style>
         * {
             margin: 0;
@@ -95,8 +495,7 @@ html_page = """
 
         .sidebar {
             width: 80px;
-            background: rgba(45, 55, 72, 0.95);
-            backdrop-filter: blur(10px);
+            background: #2D3748;
             display: flex;
             flex-direction: column;
             align-items: center;
@@ -118,16 +517,11 @@ html_page = """
             justify-content: center;
             margin-bottom: 1rem;
             cursor: pointer;
-            transition: all 0.3s ease;
+            transition: transform 0.25s ease;
             color: white;
             font-size: 20px;
         }
 
-        .sidebar-icon:hover {
-            background: rgba(255, 255, 255, 0.2);
-            transform: translateY(-2px);
-        }
-
         .main-content {
             flex: 1;
             padding: 2rem;
@@ -158,7 +552,7 @@ html_page = """
             border-radius: 12px;
             font-weight: 600;
             cursor: pointer;
-            transition: all 0.3s ease;
+            transition: transform 0.25s ease;
             font-size: 0.9rem;
             margin-bottom: 2rem;
             display: inline-flex;
@@ -166,201 +560,27 @@ html_page = """
             gap: 0.5rem;
         }
 
-        .submit-button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 25px rgba(79, 209, 199, 0.4);
-        }
-
-        .submit-button:disabled {
+        .submit-button:disabled,
+        form:invalid .submit-button {
             background: #CBD5E0;
             cursor: not-allowed;
             transform: none;
             box-shadow: none;
         }
 
-        .result-card {
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            padding: 2rem;
-            margin-bottom: 2rem;
-            box-shadow: 0 10px 40px rgba(0, 0, 0, 0.1);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-        }
-
-        .result-header {
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-            margin-bottom: 1rem;
-        }
-
-        .result-icon {
-            width: 48px;
-            height: 48px;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 24px;
-            color: white;
-        }
-
-        .result-icon.success {
-            background: linear-gradient(135deg, #68D391 0%, #38A169 100%);
-        }
-
-        .result-icon.warning {
-            background: linear-gradient(135deg, #F6AD55 0%, #ED8936 100%);
-        }
-
-        .result-icon.danger {
-            background: linear-gradient(135deg, #FC8181 0%, #E53E3E 100%);
-        }
-
-        .result-title {
-            font-size: 1.5rem;
-            font-weight: 700;
-            color: #2D3748;
-        }
-
-        .result-subtitle {
-            font-size: 1.25rem;
-            font-weight: 600;
-            color: #4A5568;
-        }
-
-        .result-probability {
-            font-size: 1rem;
-            color: #718096;
-            margin-top: 0.5rem;
-        }
-
-        .breakdown-section {
-            margin-bottom: 2rem;
-        }
-
-        .breakdown-title {
-            font-size: 1.25rem;
-            font-weight: 600;
-            color: #2D3748;
-            margin-bottom: 1rem;
+        /* Every field is required, so the browser keeps :invalid up to date without any script */
+        form:invalid .submit-button {
+            pointer-events: none;
         }
 
-        .breakdown-items {
-            display: flex;
-            flex-direction: column;
-            gap: 1rem;
-            margin-bottom: 2rem;
-        }
-
-        .breakdown-item {
-            display: flex;
-            align-items: flex-start;
-            gap: 1rem;
-            padding: 1rem;
-            background: rgba(255, 255, 255, 0.6);
-            border-radius: 12px;
-            transition: all 0.3s ease;
-        }
-
-        .breakdown-item:hover {
-            background: rgba(255, 255, 255, 0.8);
-            transform: translateY(-1px);
-        }
-
-        .breakdown-icon {
-            width: 40px;
-            height: 40px;
-            border-radius: 10px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 18px;
-            color: white;
-            background: linear-gradient(135deg, #4FD1C7 0%, #38B2AC 100%);
-            flex-shrink: 0;
-        }
-
-        .breakdown-content h4 {
-            font-weight: 600;
-            color: #2D3748;
-            margin-bottom: 0.25rem;
-        }
-
-        .breakdown-content p {
-            color: #718096;
-            font-size: 0.9rem;
-        }
-
-        .ai-suggestions {
-            background: rgba(255, 255, 255, 0.9);
-            border-radius: 16px;
-            padding: 1.5rem;
-            margin-bottom: 2rem;
-        }
-
-        .ai-suggestions h3 {
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-            font-size: 1rem;
-            font-weight: 600;
-            color: #2D3748;
-            margin-bottom: 1rem;
-        }
-
-        .ai-suggestions ul {
-            list-style: none;
-            padding: 0;
-        }
-
-        .ai-suggestions li {
-            padding: 0.5rem 0;
-            color: #4A5568;
-            font-size: 0.9rem;
-            position: relative;
-            padding-left: 1.5rem;
-        }
-
-        .ai-suggestions li:before {
-            content: "•";
-            color: #4FD1C7;
-            font-weight: bold;
-            position: absolute;
-            left: 0;
-        }
-
-        .charts-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 2rem;
-            margin-bottom: 2rem;
-        }
-
-        .chart-card {
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border-radius: 16px;
-            padding: 1.5rem;
-            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
-        }
-
-        .chart-card h3 {
-            font-size: 1rem;
-            font-weight: 600;
-            color: #2D3748;
-            margin-bottom: 1rem;
-            text-align: center;
-        }
-
-        .chart-container {
-            position: relative;
-            height: 200px;
-        }
-
-        .chart-container.large {
-            height: 300px;
+        .icon {
+            width: 1em;
+            height: 1em;
+            fill: none;
+            stroke: currentColor;
+            stroke-width: 2;
+            stroke-linecap: round;
+            stroke-linejoin: round;
         }
 
         .form-section {
@@ -376,7 +596,14 @@ html_page = """
             margin-bottom: 1.5rem;
         }
 
-        .form-group label {
+        fieldset.form-group {
+            border: none;
+            padding: 0;
+            min-width: 0;
+        }
+
+        .form-group > label,
+        .form-group legend {
             display: block;
             font-weight: 600;
             color: #2D3748;
@@ -384,8 +611,7 @@ html_page = """
             font-size: 0.9rem;
         }
 
-        .form-group input[type="file"],
-        .form-group select {
+        .form-group input[type="file"] {
             width: 100%;
             padding: 0.75rem;
             border: 2px solid #E2E8F0;
@@ -395,11 +621,19 @@ html_page = """
             background: white;
         }
 
-        .form-group input[type="file"]:focus,
-        .form-group select:focus {
-            outline: none;
-            border-color: #4FD1C7;
-            box-shadow: 0 0 0 3px rgba(79, 209, 199, 0.1);
+        .radio-group {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 0.5rem 1.25rem;
+        }
+
+        .radio-group label {
+            display: inline-flex;
+            align-items: center;
+            gap: 0.4rem;
+            color: #2D3748;
+            font-size: 0.9rem;
+            cursor: pointer;
         }
 
         .error-message {
@@ -409,6 +643,12 @@ html_page = """
             display: none;
         }
 
+        /* Field errors appear once the user has changed the form and the field is still empty */
+        body.form-touched .form-group :invalid ~ .error-message,
+        body.form-touched fieldset:invalid .error-message {
+            display: block;
+        }
+
         .disclaimer {
             background: rgba(255, 255, 255, 0.9);
             border-left: 4px solid #4FD1C7;
@@ -419,105 +659,14 @@ html_page = """
             color: #4A5568;
         }
 
-        .table-section {
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border-radius: 16px;
-            padding: 1.5rem;
-            margin-bottom: 2rem;
-            overflow-x: auto;
-        }
-
-        .table-section table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-
-        .table-section th,
-        .table-section td {
-            padding: 0.75rem;
-            text-align: left;
-            border-bottom: 1px solid #E2E8F0;
-            font-size: 0.9rem;
-        }
-
-        .table-section th {
-            background: #F7FAFC;
-            font-weight: 600;
-            color: #2D3748;
-        }
-
-        .guideline-section {
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border-radius: 16px;
-            padding: 1.5rem;
-            margin-bottom: 1rem;
-        }
-
-        .guideline-header {
-            cursor: pointer;
-            padding: 1rem;
-            background: linear-gradient(135deg, #2D3748 0%, #4A5568 100%);
-            color: white;
-            border-radius: 12px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            margin: 0;
-        }
-
-        .guideline-header:hover {
-            transform: translateY(-1px);
-            box-shadow: 0 4px 20px rgba(45, 55, 72, 0.3);
-        }
-
-        .guideline-table {
-            max-height: 0;
-            opacity: 0;
-            overflow: hidden;
-            transition: all 0.3s ease;
-        }
-
-        .guideline-table.visible {
-            max-height: 500px;
-            opacity: 1;
-            margin-top: 1rem;
-        }
-
-        .loading-spinner {
-            text-align: center;
-            padding: 2rem;
-            color: #4A5568;
-        }
-
-        .spinner {
-            display: inline-block;
-            border: 4px solid #E2E8F0;
-            border-top: 4px solid #4FD1C7;
-            border-radius: 50%;
-            width: 32px;
-            height: 32px;
-            animation: spin 1s linear infinite;
-            margin-left: 10px;
-        }
-
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-
-        .hidden {
-            display: none !important;
-        }
-
-        .green { color: #38A169; }
-        .red { color: #E53E3E; }
-        .orange { color: #ED8936; }
-        .black { color: #2D3748; }
-
-        .null-cell {
-            background-color: #F7FAFC;
-            color: #A0AEC0;
+        /* Page state lives in classes on <body>, so one class flip shows or hides a whole section */
+        body:not(.has-results) .result-card,
+        body:not(.has-results) .breakdown-section,
+        body:not(.has-diagnosis) .charts-grid,
+        body:not(.has-diagnosis) .table-section,
+        body:not(.has-error) .error-banner,
+        body:not(.is-loading) .loading-spinner {
+            display: none;
         }
 
         @media (max-width: 768px) {
@@ -525,22 +674,33 @@ html_page = """
                 margin-right: 0;
                 padding: 1rem;
             }
-            
+
             .sidebar {
                 display: none;
             }
-            
-            .charts-grid {
-                grid-template-columns: 1fr;
-            }
-            
+
             .header h1 {
                 font-size: 1.5rem;
             }
         }
     </style>
+    <link rel="preload" as="style" href="{{ url_for('static', filename='kiosk.css', v=kiosk_css_version) }}" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="{{ url_for('static', filename='kiosk.css', v=kiosk_css_version) }}"></noscript>
 </head>
-<body>
+<body class="{% if result %}has-results {% endif %}{% if diagnosis %}has-diagnosis {% endif %}{% if error %}has-error{% endif %}">
+    <svg style="display: none;">
+        <symbol id="i-heart" viewBox="0 0 24 24"><path d="M12 21s-7-4.5-9.5-9A5 5 0 0 1 12 6a5 5 0 0 1 9.5 6C19 16.5 12 21 12 21z"/></symbol>
+        <symbol id="i-apple" viewBox="0 0 24 24"><path d="M12 7c-1.5-1-5-1.5-6.5 1.5S5 17 8 20c1.5 1.5 2.5 1 4 .5 1.5.5 2.5 1 4-.5 3-3 4-8.5 2.5-11.5S13.5 6 12 7zM12 7c0-2 1-3.5 3-4"/></symbol>
+        <symbol id="i-moon" viewBox="0 0 24 24"><path d="M20 14.5A8 8 0 1 1 9.5 4a6.5 6.5 0 0 0 10.5 10.5z"/></symbol>
+        <symbol id="i-bulb" viewBox="0 0 24 24"><path d="M9 18h6M10 21h4M12 3a6 6 0 0 0-3.5 10.9c.6.5 1 1.2 1 2.1h5c0-.9.4-1.6 1-2.1A6 6 0 0 0 12 3z"/></symbol>
+        <symbol id="i-menu" viewBox="0 0 24 24"><path d="M4 6h16M4 12h16M4 18h16"/></symbol>
+        <symbol id="i-calendar" viewBox="0 0 24 24"><rect x="3" y="5" width="18" height="16" rx="2"/><path d="M3 10h18M8 3v4M16 3v4"/></symbol>
+        <symbol id="i-clipboard" viewBox="0 0 24 24"><rect x="5" y="4" width="14" height="17" rx="2"/><path d="M9 4V3h6v1M9 10h6M9 14h6"/></symbol>
+        <symbol id="i-check" viewBox="0 0 24 24"><path d="M5 12.5l4.5 4.5L19 7.5"/></symbol>
+        <symbol id="i-alert" viewBox="0 0 24 24"><path d="M12 3L2 20h20zM12 10v4M12 17v.5"/></symbol>
+        <symbol id="i-bolt" viewBox="0 0 24 24"><path d="M13 2L4 14h7l-1 8 9-12h-7z"/></symbol>
+    </svg>
+
     <div class="main-container">
         <div class="main-content">
             <div class="header">
@@ -555,7 +715,7 @@ html_page = """
             <form method="post" enctype="multipart/form-data" id="analysisForm" onsubmit="showLoading()">
                 <div class="form-section">
                     <div class="submit-button-container" style="margin-bottom: 2rem;">
-                        <button type="submit" id="submitBtn" class="submit-button" disabled>
+                        <button type="submit" id="submitBtn" class="submit-button">
                             <span>+</span> Submit a New Report
                         </button>
                     </div>
@@ -563,35 +723,33 @@ html_page = """
                     <div class="form-group">
                         <label for="file">Upload Clinical Report (PDF):</label>
                         <input type="file" name="file" id="file" accept=".pdf" required aria-label="Upload clinical report PDF">
-                        <span id="file-error" class="error-message">Please upload a PDF file.</span>
-                    </div>
-
-                    <div class="form-group">
-                        <label for="heart_disease">Heart Disease (Past/Current):</label>
-                        <select name="heart_disease" id="heart_disease" required aria-label="Select heart disease status">
-                            <option value="">Select</option>
-                            <option value="Yes">Yes</option>
-                            <option value="No">No</option>
-                        </select>
-                        <span id="heart-disease-error" class="error-message">Please select an option.</span>
+                        <span class="error-message">Please upload a PDF file.</span>
                     </div>
 
-                    <div class="form-group">
-                        <label for="smoking_history">Smoking History:</label>
-                        <select name="smoking_history" id="smoking_history" required aria-label="Select smoking history">
-                            <option value="">Select</option>
-                            <option value="No Info">No Info</option>
-                            <option value="never">Never</option>
-                            <option value="former">Former</option>
-                            <option value="current">Current</option>
-                            <option value="not current">Not Current</option>
-                        </select>
-                        <span id="smoking-history-error" class="error-message">Please select an option.</span>
-                    </div>
+                    <fieldset class="form-group">
+                        <legend>Heart Disease (Past/Current):</legend>
+                        <div class="radio-group">
+                            <label><input type="radio" name="heart_disease" value="Yes" required> Yes</label>
+                            <label><input type="radio" name="heart_disease" value="No" required> No</label>
+                        </div>
+                        <span class="error-message">Please select an option.</span>
+                    </fieldset>
+
+                    <fieldset class="form-group">
+                        <legend>Smoking History:</legend>
+                        <div class="radio-group">
+                            <label><input type="radio" name="smoking_history" value="No Info" required> No Info</label>
+                            <label><input type="radio" name="smoking_history" value="never" required> Never</label>
+                            <label><input type="radio" name="smoking_history" value="former" required> Former</label>
+                            <label><input type="radio" name="smoking_history" value="current" required> Current</label>
+                            <label><input type="radio" name="smoking_history" value="not current" required> Not Current</label>
+                        </div>
+                        <span class="error-message">Please select an option.</span>
+                    </fieldset>
                 </div>
             </form>
 
-            <div id="loadingSpinner" class="loading-spinner hidden">
+            <div id="loadingSpinner" class="loading-spinner">
                 Processing your report...
                 <span class="spinner"></span>
             </div>
@@ -599,15 +757,15 @@ html_page = """
             {% if result %}
             <div class="result-card">
                 <div class="result-header">
-                    <div class="result-icon {% if 'Low Risk' in result or '0.0%' in result %}success{% elif 'Medium Risk' in result %}warning{% else %}danger{% endif %}">
-                        {% if 'Low Risk' in result or '0.0%' in result %}✓{% elif 'Medium Risk' in result %}⚠{% else %}⚡{% endif %}
+                    <div class="result-icon {% if risk_level == 'low' %}success{% elif risk_level == 'medium' %}warning{% else %}danger{% endif %}">
+                        {% if risk_level == 'low' %}<svg class="icon"><use href="#i-check"/></svg>{% elif risk_level == 'medium' %}<svg class="icon"><use href="#i-alert"/></svg>{% else %}<svg class="icon"><use href="#i-bolt"/></svg>{% endif %}
                     </div>
                     <div>
                         <div class="result-title">
-                            {% if 'Low Risk' in result or '0.0%' in result %}Great News!{% elif 'Medium Risk' in result %}Attention Needed{% else %}High Risk Detected{% endif %}
+                            {% if risk_level == 'low' %}Great News!{% elif risk_level == 'medium' %}Attention Needed{% else %}High Risk Detected{% endif %}
                         </div>
                         <div class="result-subtitle">
-                            {% if 'Low Risk' in result or '0.0%' in result %}Your Health is On Track{% elif 'Medium Risk' in result %}Monitor Your Health{% else %}Please Consult a Doctor{% endif %}
+                            {% if risk_level == 'low' %}Your Health is On Track{% elif risk_level == 'medium' %}Monitor Your Health{% else %}Please Consult a Doctor{% endif %}
                         </div>
                         <div class="result-probability">{{ result }}</div>
                     </div>
@@ -619,21 +777,21 @@ html_page = """
                 
                 <div class="breakdown-items">
                     <div class="breakdown-item">
-                        <div class="breakdown-icon">💓</div>
+                        <div class="breakdown-icon"><svg class="icon"><use href="#i-heart"/></svg></div>
                         <div class="breakdown-content">
                             <h4>Your Vitals:</h4>
                             <p>Recent readings are in the {% if diagnosis %}{{ 'healthy' if diagnosis.glucose.color == 'green' else 'concerning' }}{% else %}normal{% endif %} range, which is {% if diagnosis %}{{ 'great!' if diagnosis.glucose.color == 'green' else 'needs attention.' }}{% else %}great!{% endif %}</p>
                         </div>
                     </div>
                     <div class="breakdown-item">
-                        <div class="breakdown-icon">🍎</div>
+                        <div class="breakdown-icon"><svg class="icon"><use href="#i-apple"/></svg></div>
                         <div class="breakdown-content">
                             <h4>Diet:</h4>
                             <p>Keep up the good work with your balanced meals.</p>
                         </div>
                     </div>
                     <div class="breakdown-item">
-                        <div class="breakdown-icon">😴</div>
+                        <div class="breakdown-icon"><svg class="icon"><use href="#i-moon"/></svg></div>
                         <div class="breakdown-content">
                             <h4>Sleep:</h4>
                             <p>Consistent sleep patterns are boosting your well-being.</p>
@@ -642,7 +800,7 @@ html_page = """
                 </div>
 
                 <div class="ai-suggestions">
-                    <h3><span style="font-size: 1.2rem;">💡</span> AI Suggestions</h3>
+                    <h3><span style="font-size: 1.2rem;"><svg class="icon"><use href="#i-bulb"/></svg></span> AI Suggestions</h3>
                     <div id="ollama-output" role="region" aria-live="polite" aria-label="AI Recommendations">
                         <ul>
                             <li>Activity Tip: Aim for 3-minute walk today.</li>
@@ -659,25 +817,25 @@ html_page = """
                 <div class="chart-card">
                     <h3>Vital Signs Overview</h3>
                     <div class="chart-container">
-                        <canvas id="vitalsChart"></canvas>
+                        <canvas id="vitalsChart" width="560" height="200"></canvas>
                     </div>
                 </div>
                 <div class="chart-card">
                     <h3>Prediction Confidence</h3>
                     <div class="chart-container">
-                        <canvas id="confidenceChart"></canvas>
+                        <canvas id="confidenceChart" width="560" height="200" data-prob="{{ diabetes_prob }}"></canvas>
                     </div>
                 </div>
                 <div class="chart-card">
                     <h3>Health Risk Profile</h3>
                     <div class="chart-container large">
-                        <canvas id="riskProfileChart"></canvas>
+                        <canvas id="riskProfileChart" width="560" height="300"></canvas>
                     </div>
                 </div>
                 <div class="chart-card">
                     <h3>Risk Factor Contribution</h3>
                     <div class="chart-container">
-                        <canvas id="riskFactorChart"></canvas>
+                        <canvas id="riskFactorChart" width="560" height="200"></canvas>
                     </div>
                 </div>
             </div>
@@ -688,91 +846,37 @@ html_page = """
             <div class="table-section">
                 <table>
                     <tr><th>Metric</th><th>Value</th><th>Unit</th><th>Status</th></tr>
-                    {% if 'age' in diagnosis %}
-                    <tr>
-                        <td>Age</td>
-                        <td>{{ diagnosis.age.value }}</td>
-                        <td>{{ diagnosis.age.unit }}</td>
-                        <td class="{{ diagnosis.age.color }}">{{ diagnosis.age.status }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td>Age</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
-                    {% endif %}
-                    {% if 'sex' in diagnosis %}
-                    <tr>
-                        <td>Gender</td>
-                        <td>{{ diagnosis.sex.value }}</td>
-                        <td>{{ diagnosis.sex.unit }}</td>
-                        <td class="{{ diagnosis.sex.color }}">{{ diagnosis.sex.status }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td>Gender</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
-                    {% endif %}
-                    {% if 'bmi' in diagnosis %}
-                    <tr>
-                        <td>BMI</td>
-                        <td>{{ diagnosis.bmi.value | round(1) }}</td>
-                        <td>{{ diagnosis.bmi.unit }}</td>
-                        <td class="{{ diagnosis.bmi.color }}">{{ diagnosis.bmi.status }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td>BMI</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
-                    {% endif %}
-                    {% if 'heart_disease' in diagnosis %}
-                    <tr>
-                        <td>Heart Disease</td>
-                        <td>{{ diagnosis.heart_disease.value }}</td>
-                        <td>{{ diagnosis.heart_disease.unit }}</td>
-                        <td class="{{ diagnosis.heart_disease.color }}">{{ diagnosis.heart_disease.status }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td>Heart Disease</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
-                    {% endif %}
-                    {% if 'smoking_history' in diagnosis %}
-                    <tr>
-                        <td>Smoking History</td>
-                        <td>{{ diagnosis.smoking_history.value }}</td>
-                        <td>{{ diagnosis.smoking_history.unit }}</td>
-                        <td class="{{ diagnosis.smoking_history.color }}">{{ diagnosis.smoking_history.status }}</td>
-                    </tr>
-                    {% else %}
-                    <tr><td>Smoking History</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
-                    {% endif %}
-                    {% if 'hypertension' in diagnosis %}
+                    {% for key, label, precision in DIAGNOSIS_ROWS %}
+                    {% if key in diagnosis %}
+                    {% set item = diagnosis[key] %}
                     <tr>
-                        <td>Hypertension</td>
-                        <td>{{ diagnosis.hypertension.value }}</td>
-                        <td>{{ diagnosis.hypertension.unit }}</td>
-                        <td class="{{ diagnosis.hypertension.color }}">{{ diagnosis.hypertension.status }}</td>
+                        <td>{{ label }}</td>
+                        <td>{{ item.value | round(precision) if precision is not none else item.value }}</td>
+                        <td>{{ item.unit }}</td>
+                        <td class="{{ item.color }}">{{ item.status }}</td>
                     </tr>
                     {% else %}
-                    <tr><td>Hypertension</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
+                    <tr><td>{{ label }}</td><td class="null-cell">-</td><td class="null-cell">-</td><td class="null-cell">-</td></tr>
                     {% endif %}
-                    {% if 'glucose' in diagnosis %}
+                    {% endfor %}
+                    {% macro dual_unit_row(label, item, value, unit, alt_value, alt_unit) %}
                     <tr>
-                        <td>Blood Glucose ({{ diagnosis.glucose.category }})</td>
-                        <td>{{ diagnosis.glucose.value_mg | round(1) }}</td>
-                        <td>mg/dL</td>
-                        <td rowspan="2" class="{{ diagnosis.glucose.color }}">{{ diagnosis.glucose.status }}</td>
+                        <td>{{ label }}</td>
+                        <td>{{ value }}</td>
+                        <td>{{ unit }}</td>
+                        <td rowspan="2" class="{{ item.color }}">{{ item.status }}</td>
                     </tr>
                     <tr>
                         <td></td>
-                        <td>{{ diagnosis.glucose.value_mmol | round(1) }}</td>
-                        <td>mmol/L</td>
+                        <td>{{ alt_value }}</td>
+                        <td>{{ alt_unit }}</td>
                     </tr>
+                    {% endmacro %}
+                    {% if 'glucose' in diagnosis %}
+                    {{ dual_unit_row('Blood Glucose (' ~ diagnosis.glucose.category ~ ')', diagnosis.glucose, diagnosis.glucose.value_mg | round(1), 'mg/dL', diagnosis.glucose.value_mmol | round(1), 'mmol/L') }}
                     {% endif %}
                     {% if 'hba1c' in diagnosis %}
-                    <tr>
-                        <td>HbA1c Level</td>
-                        <td>{{ diagnosis.hba1c.value_percent | round(1) }}</td>
-                        <td>%</td>
-                        <td rowspan="2" class="{{ diagnosis.hba1c.color }}">{{ diagnosis.hba1c.status }}</td>
-                    </tr>
-                    <tr>
-                        <td></td>
-                        <td>{{ diagnosis.hba1c.value_mmol | round(0) }}</td>
-                        <td>mmol/mol</td>
-                    </tr>
+                    {{ dual_unit_row('HbA1c Level', diagnosis.hba1c, diagnosis.hba1c.value_percent | round(1), '%', diagnosis.hba1c.value_mmol | round(0), 'mmol/mol') }}
                     {% endif %}
                 </table>
             </div>
@@ -823,47 +927,42 @@ html_page = """
             </div>
 
             {% if error %}
-            <div style="background: #FED7D7; color: #C53030; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
+            <div class="error-banner" style="background: #FED7D7; color: #C53030; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
                 {{ error }}
             </div>
             {% endif %}
         </div>
 
         <div class="sidebar">
-            <div class="sidebar-icon" title="Menu">☰</div>
-            <div class="sidebar-icon" title="Favorites">♡</div>
-            <div class="sidebar-icon" title="Calendar">📅</div>
-            <div class="sidebar-icon" title="Reports">📋</div>
+            <div class="sidebar-icon" title="Menu"><svg class="icon"><use href="#i-menu"/></svg></div>
+            <div class="sidebar-icon" title="Favorites"><svg class="icon"><use href="#i-heart"/></svg></div>
+            <div class="sidebar-icon" title="Calendar"><svg class="icon"><use href="#i-calendar"/></svg></div>
+            <div class="sidebar-icon" title="Reports"><svg class="icon"><use href="#i-clipboard"/></svg></div>
         </div>
     </div>
 
+    {% if result and diagnosis %}
+    <!-- Chart values, colours and statuses, prepared on the server -->
+    <script type="application/json" id="chart-data">{{ chart_data | tojson }}</script>
+    {% endif %}
     <script>
+        // The script sits at the end of <body>, so the form elements already exist here
+        const els = {
+            form: document.getElementById('analysisForm'),
+            submitBtn: document.getElementById('submitBtn')
+        };
+
         function showLoading() {
-            document.getElementById('loadingSpinner').classList.remove('hidden');
-            document.querySelector('button[type="submit"]').disabled = true;
+            document.body.classList.add('is-loading');
+            els.submitBtn.disabled = true;
         }
 
         function resetResults() {
-            document.getElementById('analysisForm').reset();
-            // Hide all result elements
-            const elementsToHide = [
-                'resultDiv', 'explanationDiv', 'diagnosisTableDiv', 'errorDiv', 'loadingSpinner'
-            ];
-            elementsToHide.forEach(id => {
-                const element = document.getElementById(id);
-                if (element) element.classList.add('hidden');
-            });
-
-            // Hide charts
-            const charts = ['vitalsChart', 'confidenceChart', 'riskProfileChart', 'riskFactorChart'];
-            charts.forEach(chartId => {
-                const chart = document.getElementById(chartId);
-                if (chart && chart.parentNode) chart.parentNode.classList.add('hidden');
-            });
-
-            document.querySelectorAll('.error-message').forEach(span => span.style.display = 'none');
+            els.form.reset();
+            // Results, charts, the spinner and field errors are all hidden by the body classes
+            document.body.classList.remove('has-results', 'has-diagnosis', 'has-error', 'is-loading', 'form-touched');
             document.querySelectorAll('.guideline-table').forEach(table => table.classList.remove('visible'));
-            validateForm();
+            els.submitBtn.disabled = false;
         }
 
         function toggleGuideline(header) {
@@ -871,48 +970,62 @@ html_page = """
             table.classList.toggle('visible');
         }
 
-        function validateForm() {
-            const fileInput = document.getElementById('file');
-            const heartDisease = document.getElementById('heart_disease');
-            const smokingHistory = document.getElementById('smoking_history');
-            const submitBtn = document.getElementById('submitBtn');
-            const fileError = document.getElementById('file-error');
-            const heartDiseaseError = document.getElementById('heart-disease-error');
-            const smokingHistoryError = document.getElementById('smoking-history-error');
-
-            const isFileValid = fileInput.files.length > 0;
-            const isHeartDiseaseValid = heartDisease.value !== '';
-            const isSmokingHistoryValid = smokingHistory.value !== '';
-
-            fileError.style.display = isFileValid ? 'none' : 'block';
-            heartDiseaseError.style.display = isHeartDiseaseValid ? 'none' : 'block';
-            smokingHistoryError.style.display = isSmokingHistoryValid ? 'none' : 'block';
-
-            submitBtn.disabled = !(isFileValid && isHeartDiseaseValid && isSmokingHistoryValid);
-        }
-
         // AI Recommendations Streaming
         {% if result %}
         function startStreaming() {
             const eventSource = new EventSource("/stream_recommendation");
             const outputDiv = document.getElementById("ollama-output");
             outputDiv.innerHTML = "";
+
+            // Tokens are buffered and appended to a single text node once per animation frame
+            const textNode = outputDiv.appendChild(document.createTextNode(""));
+            let buf = "", rafId = 0;
+            function flush() {
+                textNode.appendData(buf);
+                buf = "";
+                rafId = 0;
+            }
+
+            // Write out any tokens still waiting on a frame before the error goes after them
+            function showError(message) {
+                cancelAnimationFrame(rafId);
+                flush();
+                if (textNode.length) {
+                    outputDiv.appendChild(document.createElement("br"));
+                }
+                const span = outputDiv.appendChild(document.createElement("span"));
+                span.style.color = "#E53E3E";
+                span.textContent = message;
+            }
             
+            // A reconnect regenerates the answer from the start, so drop the partial one
+            eventSource.onopen = function() {
+                cancelAnimationFrame(rafId);
+                buf = "";
+                rafId = 0;
+                textNode.data = "";
+            };
+
             eventSource.onmessage = function(event) {
                 const data = JSON.parse(event.data);
                 if (data.type === "result") {
-                    outputDiv.innerHTML += data.text;
+                    buf += data.text;
+                    if (!rafId) {
+                        rafId = requestAnimationFrame(flush);
+                    }
                 } else if (data.type === "end") {
                     eventSource.close();
                 } else if (data.type === "error") {
-                    outputDiv.innerHTML = "<span style='color:#E53E3E;'>" + data.text + "</span>";
+                    showError(data.text);
                     eventSource.close();
                 }
             };
             
+            // Dropped connections are retried by the browser; only report the error once it gives up
             eventSource.onerror = function() {
-                outputDiv.innerHTML += "<br><span style='color:#E53E3E;'>Error receiving AI response.</span>";
-                eventSource.close();
+                if (eventSource.readyState === EventSource.CLOSED) {
+                    showError("Error receiving AI response.");
+                }
             };
         }
 
@@ -921,302 +1034,429 @@ html_page = """
         });
         {% endif %}
 
-        {% if diagnosis %}
+        {% if result and diagnosis %}
+        const CHART_DATA = JSON.parse(document.getElementById('chart-data').textContent);
+        // Status text shown in the radar and pie tooltips
+        const STATUS = CHART_DATA.status;
+
+        function statusLabel(context) {
+            return `${context.label}: ${context.raw}% (Status: ${STATUS[context.label]})`;
+        }
+
         // Vital Signs Chart
-        const vitalsCtx = document.getElementById('vitalsChart').getContext('2d');
-        new Chart(vitalsCtx, {
-            type: 'bar',
-            data: {
-                labels: ['BMI', 'Blood Glucose (mg/dL)', 'HbA1c (%)'],
-                datasets: [{
-                    label: 'Your Values',
-                    data: [
-                        {{ diagnosis.bmi.value | round(1) if 'bmi' in diagnosis else 0 }},
-                        {{ diagnosis.glucose.value_mg | round(1) if 'glucose' in diagnosis else 0 }},
-                        {{ diagnosis.hba1c.value_percent | round(1) if 'hba1c' in diagnosis else 0 }}
-                    ],
-                    backgroundColor: [
-                        '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181'
-                    ],
-                    borderColor: '#2D3748',
-                    borderWidth: 2,
-                    borderRadius: 8
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        grid: {
-                            color: '#E2E8F0'
+        function initVitals(canvas) {
+            new Chart(canvas.getContext('2d'), {
+                type: 'bar',
+                data: {
+                    labels: ['BMI', 'Blood Glucose (mg/dL)', 'HbA1c (%)'],
+                    datasets: [{
+                        label: 'Your Values',
+                        data: CHART_DATA.vitals.values,
+                        backgroundColor: CHART_DATA.vitals.colors,
+                        borderColor: '#2D3748',
+                        borderWidth: 2,
+                        borderRadius: 8
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    resizeDelay: 200,
+                    normalized: true,
+                    animation: false,
+                    transitions: { active: { animation: { duration: 0 } } },
+                    scales: {
+                        y: {
+                            beginAtZero: true,
+                            grid: {
+                                color: '#E2E8F0'
+                            },
+                            ticks: {
+                                color: '#4A5568'
+                            }
                         },
-                        ticks: {
-                            color: '#4A5568'
+                        x: {
+                            grid: {
+                                display: false
+                            },
+                            ticks: {
+                                color: '#4A5568',
+                                font: {
+                                    size: 12
+                                }
+                            }
                         }
                     },
-                    x: {
-                        grid: {
+                    plugins: {
+                        legend: {
                             display: false
                         },
-                        ticks: {
-                            color: '#4A5568',
-                            font: {
-                                size: 12
-                            }
-                        }
-                    }
-                },
-                plugins: {
-                    legend: {
-                        display: false
-                    },
-                    annotation: {
-                        annotations: {
-                            bmiNormal: {
-                                type: 'line',
-                                yMin: 18.5,
-                                yMax: 18.5,
-                                borderColor: '#68D391',
-                                borderWidth: 2,
-                                label: { content: 'BMI Normal Min', enabled: true, position: 'start' }
-                            },
-                            bmiNormalMax: {
-                                type: 'line',
-                                yMin: 24.9,
-                                yMax: 24.9,
-                                borderColor: '#68D391',
-                                borderWidth: 2,
-                                label: { content: 'BMI Normal Max', enabled: true, position: 'start' }
-                            },
-                            glucoseNormalMax: {
-                                type: 'line',
-                                xMin: 1,
-                                xMax: 1,
-                                yMin: {{ 7.7 * 18.0 if diagnosis.glucose.category == 'Random' else 6.0 * 18.0 if 'glucose' in diagnosis else 0 }},
-                                yMax: {{ 7.7 * 18.0 if diagnosis.glucose.category == 'Random' else 6.0 * 18.0 if 'glucose' in diagnosis else 0 }},
-                                borderColor: '#68D391',
-                                borderWidth: 2,
-                                label: { content: 'Glucose Normal Max', enabled: true, position: 'start' }
-                            },
-                            hba1cNormalMax: {
-                                type: 'line',
-                                xMin: 2,
-                                xMax: 2,
-                                yMin: 5.7,
-                                yMax: 5.7,
-                                borderColor: '#68D391',
-                                borderWidth: 2,
-                                label: { content: 'HbA1c Normal Max', enabled: true, position: 'start' }
+                        annotation: {
+                            annotations: {
+                                bmiNormal: {
+                                    type: 'line',
+                                    yMin: 18.5,
+                                    yMax: 18.5,
+                                    borderColor: '#68D391',
+                                    borderWidth: 2,
+                                    label: { content: 'BMI Normal Min', enabled: true, position: 'start' }
+                                },
+                                bmiNormalMax: {
+                                    type: 'line',
+                                    yMin: 24.9,
+                                    yMax: 24.9,
+                                    borderColor: '#68D391',
+                                    borderWidth: 2,
+                                    label: { content: 'BMI Normal Max', enabled: true, position: 'start' }
+                                },
+                                glucoseNormalMax: {
+                                    type: 'line',
+                                    xMin: 1,
+                                    xMax: 1,
+                                    yMin: CHART_DATA.vitals.glucoseNormalMax,
+                                    yMax: CHART_DATA.vitals.glucoseNormalMax,
+                                    borderColor: '#68D391',
+                                    borderWidth: 2,
+                                    label: { content: 'Glucose Normal Max', enabled: true, position: 'start' }
+                                },
+                                hba1cNormalMax: {
+                                    type: 'line',
+                                    xMin: 2,
+                                    xMax: 2,
+                                    yMin: 5.7,
+                                    yMax: 5.7,
+                                    borderColor: '#68D391',
+                                    borderWidth: 2,
+                                    label: { content: 'HbA1c Normal Max', enabled: true, position: 'start' }
+                                }
                             }
                         }
                     }
                 }
-            }
-        });
+            });
+        }
 
         // Confidence Chart
-        const confidenceCtx = document.getElementById('confidenceChart').getContext('2d');
-        const probMatch = '{{ result }}'.match(/Probability of Diabetes: (\d+\.\d)%/);
-        const diabetesProb = probMatch ? parseFloat(probMatch[1]) : 0;
+        function initConfidence(canvas) {
+            const diabetesProb = parseFloat(canvas.dataset.prob) || 0;
+            const centerText = Math.round(100 - diabetesProb) + "%";
+            const subText = diabetesProb < 30 ? "LOW RISK" : diabetesProb < 70 ? "MEDIUM RISK" : "HIGH RISK";
+            // Fonts and text positions only change when the chart is resized
+            let layout = null;
         
-        new Chart(confidenceCtx, {
-            type: 'doughnut',
-            data: {
-                labels: ['Diabetes Risk', 'Normal'],
-                datasets: [{
-                    data: [diabetesProb, 100 - diabetesProb],
-                    backgroundColor: ['#FC8181', '#68D391'],
-                    borderColor: '#FFFFFF',
-                    borderWidth: 3
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                cutout: '70%',
-                plugins: {
-                    legend: {
-                        position: 'bottom',
-                        labels: {
-                            color: '#4A5568',
-                            font: { size: 12 }
+            new Chart(canvas.getContext('2d'), {
+                type: 'doughnut',
+                data: {
+                    labels: ['Diabetes Risk', 'Normal'],
+                    datasets: [{
+                        data: [diabetesProb, 100 - diabetesProb],
+                        backgroundColor: ['#FC8181', '#68D391'],
+                        borderColor: '#FFFFFF',
+                        borderWidth: 3
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    resizeDelay: 200,
+                    animation: false,
+                    transitions: { active: { animation: { duration: 0 } } },
+                    cutout: '70%',
+                    plugins: {
+                        legend: {
+                            position: 'bottom',
+                            labels: {
+                                color: '#4A5568',
+                                font: { size: 12 }
+                            }
                         }
                     }
-                }
-            },
-            plugins: [{
-                beforeDraw: function(chart) {
-                    const width = chart.width,
-                          height = chart.height,
-                          ctx = chart.ctx;
-                    ctx.restore();
-                    const fontSize = (height / 114).toFixed(2);
-                    ctx.font = fontSize + "em Arial";
-                    ctx.fillStyle = "#2D3748";
-                    ctx.textBaseline = "middle";
-                    const text = Math.round(100 - diabetesProb) + "%";
-                    const textX = Math.round((width - ctx.measureText(text).width) / 2);
-                    const textY = height / 2;
-                    ctx.fillText(text, textX, textY - 10);
-                    ctx.font = (fontSize * 0.6) + "em Arial";
-                    ctx.fillStyle = "#718096";
-                    const subText = diabetesProb < 30 ? "LOW RISK" : diabetesProb < 70 ? "MEDIUM RISK" : "HIGH RISK";
-                    const subTextX = Math.round((width - ctx.measureText(subText).width) / 2);
-                    ctx.fillText(subText, subTextX, textY + 15);
-                    ctx.save();
-                }
-            }]
-        });
+                },
+                plugins: [{
+                    beforeDraw: function(chart) {
+                        const width = chart.width,
+                              height = chart.height,
+                              ctx = chart.ctx;
+                        ctx.restore();
+                        if (!layout || layout.width !== width || layout.height !== height) {
+                            const fontSize = (height / 114).toFixed(2);
+                            layout = { width: width, height: height, font: fontSize + "em Arial", subFont: (fontSize * 0.6) + "em Arial" };
+                            ctx.font = layout.font;
+                            layout.textX = Math.round((width - ctx.measureText(centerText).width) / 2);
+                            ctx.font = layout.subFont;
+                            layout.subTextX = Math.round((width - ctx.measureText(subText).width) / 2);
+                        }
+                        const textY = height / 2;
+                        ctx.font = layout.font;
+                        ctx.fillStyle = "#2D3748";
+                        ctx.textBaseline = "middle";
+                        ctx.fillText(centerText, layout.textX, textY - 10);
+                        ctx.font = layout.subFont;
+                        ctx.fillStyle = "#718096";
+                        ctx.fillText(subText, layout.subTextX, textY + 15);
+                        ctx.save();
+                    }
+                }]
+            });
+        }
 
         // Risk Profile Chart
-        const riskProfileCtx = document.getElementById('riskProfileChart').getContext('2d');
-        new Chart(riskProfileCtx, {
-            type: 'radar',
-            data: {
-                labels: ['BMI', 'Blood Glucose', 'HbA1c', 'Hypertension', 'Heart Disease', 'Smoking History'],
-                datasets: [{
-                    label: 'Your Health Profile',
-                    data: [
-                        {{ (diagnosis.bmi.value / 40 * 100) | round(1) if 'bmi' in diagnosis else 0 }},
-                        {{ (diagnosis.glucose.value_mg / (7.7 * 18.0) * 100) | round(1) if 'glucose' in diagnosis and diagnosis.glucose.category == 'Random' else (diagnosis.glucose.value_mg / (6.0 * 18.0) * 100) | round(1) if 'glucose' in diagnosis else 0 }},
-                        {{ (diagnosis.hba1c.value_percent / 6.3 * 100) | round(1) if 'hba1c' in diagnosis else 0 }},
-                        {{ 100 if 'hypertension' in diagnosis and diagnosis.hypertension.status in ['Hypertension Stage 1', 'Hypertension Stage 2'] else 0 }},
-                        {{ 100 if 'heart_disease' in diagnosis and diagnosis.heart_disease.status == 'Yes' else 0 }},
-                        {{ 0 if 'smoking_history' in diagnosis and diagnosis.smoking_history.status == 'Never' else 50 if 'smoking_history' in diagnosis and diagnosis.smoking_history.status in ['Former', 'Not Current'] else 100 if 'smoking_history' in diagnosis else 0 }}
-                    ],
-                    backgroundColor: 'rgba(79, 209, 199, 0.2)',
-                    borderColor: '#4FD1C7',
-                    borderWidth: 2,
-                    pointBackgroundColor: [
-                        '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.hypertension.color if 'hypertension' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.hypertension.color if 'hypertension' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.heart_disease.color if 'heart_disease' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.heart_disease.color if 'heart_disease' in diagnosis else 'black' }}' === 'red' ? '#FC8181' : '#F6AD55',
-                        '{{ diagnosis.smoking_history.color if 'smoking_history' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.smoking_history.color if 'smoking_history' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '{{ diagnosis.smoking_history.color if 'smoking_history' in diagnosis else 'black' }}' === 'red' ? '#FC8181' : '#2D3748'
-                    ],
-                    pointBorderColor: '#FFFFFF',
-                    pointBorderWidth: 2
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    r: {
-                        beginAtZero: true,
-                        max: 100,
-                        grid: {
-                            color: '#E2E8F0'
-                        },
-                        pointLabels: {
-                            color: '#4A5568',
-                            font: {
-                                size: 11
-                            }
-                        },
-                        ticks: {
-                            stepSize: 20,
-                            color: '#A0AEC0',
-                            font: {
-                                size: 10
+        function initRiskProfile(canvas) {
+            new Chart(canvas.getContext('2d'), {
+                type: 'radar',
+                data: {
+                    labels: ['BMI', 'Blood Glucose', 'HbA1c', 'Hypertension', 'Heart Disease', 'Smoking History'],
+                    datasets: [{
+                        label: 'Your Health Profile',
+                        data: CHART_DATA.riskProfile.values,
+                        backgroundColor: 'rgba(79, 209, 199, 0.2)',
+                        borderColor: '#4FD1C7',
+                        borderWidth: 2,
+                        pointBackgroundColor: CHART_DATA.riskProfile.colors,
+                        pointBorderColor: '#FFFFFF',
+                        pointBorderWidth: 2
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    resizeDelay: 200,
+                    normalized: true,
+                    animation: false,
+                    transitions: { active: { animation: { duration: 0 } } },
+                    scales: {
+                        r: {
+                            beginAtZero: true,
+                            max: 100,
+                            grid: {
+                                color: '#E2E8F0'
+                            },
+                            pointLabels: {
+                                color: '#4A5568',
+                                font: {
+                                    size: 11
+                                }
                             },
-                            backdropColor: 'transparent'
+                            ticks: {
+                                stepSize: 20,
+                                color: '#A0AEC0',
+                                font: {
+                                    size: 10
+                                },
+                                backdropColor: 'transparent'
+                            }
                         }
-                    }
-                },
-                plugins: {
-                    legend: {
-                        display: false
                     },
-                    tooltip: {
-                        callbacks: {
-                            label: function(context) {
-                                const label = context.label;
-                                const value = context.raw;
-                                const statuses = {
-                                    'BMI': '{{ diagnosis.bmi.status if 'bmi' in diagnosis else 'Not Available' }}',
-                                    'Blood Glucose': '{{ diagnosis.glucose.status if 'glucose' in diagnosis else 'Not Available' }}',
-                                    'HbA1c': '{{ diagnosis.hba1c.status if 'hba1c' in diagnosis else 'Not Available' }}',
-                                    'Hypertension': '{{ diagnosis.hypertension.status if 'hypertension' in diagnosis else 'Not Available' }}',
-                                    'Heart Disease': '{{ diagnosis.heart_disease.status if 'heart_disease' in diagnosis else 'Not Available' }}',
-                                    'Smoking History': '{{ diagnosis.smoking_history.status if 'smoking_history' in diagnosis else 'Not Available' }}'
-                                };
-                                return `${label}: ${value}% (Status: ${statuses[label]})`;
+                    plugins: {
+                        legend: {
+                            display: false
+                        },
+                        tooltip: {
+                            callbacks: {
+                                label: statusLabel
                             }
                         }
                     }
                 }
-            }
-        });
+            });
+        }
 
         // Risk Factor Contribution Chart
-        const riskFactorCtx = document.getElementById('riskFactorChart').getContext('2d');
-        new Chart(riskFactorCtx, {
-            type: 'pie',
-            data: {
-                labels: ['HbA1c', 'Blood Glucose', 'Age', 'BMI', 'Hypertension'],
-                datasets: [{
-                    data: [23.07, 10.50, 2.84, 0.80, 0.16],
-                    backgroundColor: [
-                        '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.hba1c.color if 'hba1c' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.glucose.color if 'glucose' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.age.color if 'age' in diagnosis else 'black' }}' === '' ? '#2D3748' : '#2D3748',
-                        '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.bmi.color if 'bmi' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181',
-                        '{{ diagnosis.hypertension.color if 'hypertension' in diagnosis else 'black' }}' === 'green' ? '#68D391' : '{{ diagnosis.hypertension.color if 'hypertension' in diagnosis else 'black' }}' === 'orange' ? '#F6AD55' : '#FC8181'
-                    ],
-                    borderColor: '#FFFFFF',
-                    borderWidth: 2
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {
-                    legend: {
-                        position: 'bottom',
-                        labels: {
-                            color: '#4A5568',
-                            font: { size: 12 }
-                        }
-                    },
-                    tooltip: {
-                        callbacks: {
-                            label: function(context) {
-                                const label = context.label;
-                                const value = context.raw;
-                                const statuses = {
-                                    'HbA1c': '{{ diagnosis.hba1c.status if 'hba1c' in diagnosis else 'Not Available' }}',
-                                    'Blood Glucose': '{{ diagnosis.glucose.status if 'glucose' in diagnosis else 'Not Available' }}',
-                                    'Age': '{{ diagnosis.age.status if 'age' in diagnosis else 'Not Available' }}',
-                                    'BMI': '{{ diagnosis.bmi.status if 'bmi' in diagnosis else 'Not Available' }}',
-                                    'Hypertension': '{{ diagnosis.hypertension.status if 'hypertension' in diagnosis else 'Not Available' }}'
-                                };
-                                return `${label}: ${value}% (Status: ${statuses[label]})`;
+        function initRiskFactor(canvas) {
+            new Chart(canvas.getContext('2d'), {
+                type: 'pie',
+                data: {
+                    labels: ['HbA1c', 'Blood Glucose', 'Age', 'BMI', 'Hypertension'],
+                    datasets: [{
+                        data: [23.07, 10.50, 2.84, 0.80, 0.16],
+                        backgroundColor: CHART_DATA.riskFactor.colors,
+                        borderColor: '#FFFFFF',
+                        borderWidth: 2
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    resizeDelay: 200,
+                    animation: false,
+                    transitions: { active: { animation: { duration: 0 } } },
+                    plugins: {
+                        legend: {
+                            position: 'bottom',
+                            labels: {
+                                color: '#4A5568',
+                                font: { size: 12 }
+                            }
+                        },
+                        tooltip: {
+                            callbacks: {
+                                label: statusLabel
                             }
                         }
                     }
                 }
+            });
+        }
+
+        const chartInits = {
+            vitalsChart: initVitals,
+            confidenceChart: initConfidence,
+            riskProfileChart: initRiskProfile,
+            riskFactorChart: initRiskFactor
+        };
+
+        // Each chart is built the first time its canvas scrolls into view
+        function buildCharts() {
+            // Large line series get min-max decimation by default; the current charts are far below its threshold
+            Object.assign(Chart.defaults.plugins.decimation, { enabled: true, algorithm: 'min-max' });
+
+            const ids = Object.keys(chartInits);
+            if (!('IntersectionObserver' in window)) {
+                ids.forEach(id => chartInits[id](document.getElementById(id)));
+                return;
             }
-        });
+            const io = new IntersectionObserver(function(entries) {
+                entries.forEach(function(entry) {
+                    if (entry.isIntersecting) {
+                        io.unobserve(entry.target);
+                        chartInits[entry.target.id](entry.target);
+                    }
+                });
+            });
+            ids.forEach(id => io.observe(document.getElementById(id)));
+        }
+
+        // Chart.js is only fetched for result pages, without blocking the parser; observers are
+        // set up once it has loaded and the browser is idle so the form stays responsive
+        const chartScript = document.createElement('script');
+        chartScript.src = 'https://cdn.jsdelivr.net/npm/chart.js@4.4.3/dist/chart.umd.min.js';
+        chartScript.onload = function() {
+            if ('requestIdleCallback' in window) {
+                requestIdleCallback(buildCharts, { timeout: 500 });
+            } else {
+                setTimeout(buildCharts, 0);
+            }
+        };
+        document.head.appendChild(chartScript);
         {% endif %}
 
-        // Event listeners
-        document.getElementById('file').addEventListener('change', validateForm);
-        document.getElementById('heart_disease').addEventListener('change', validateForm);
-        document.getElementById('smoking_history').addEventListener('change', validateForm);
-
-        // Initial validation
-        validateForm();
+        // Validation itself is native (required + :invalid); the first change only lets field errors show
+        els.form.addEventListener('change', function() {
+            document.body.classList.add('form-touched');
+        }, { passive: true });
     </script>
 </body>
 </html>
 """
 
+# Strip indentation and blank lines once at import instead of sending them with every response
+html_page = re.sub(r'\n\s*', '\n', html_page).strip()
+
+# Metric table rows: (diagnosis key, label, decimals to round the value to or None)
+DIAGNOSIS_ROWS = (
+    ('age', 'Age', None),
+    ('sex', 'Gender', None),
+    ('bmi', 'BMI', 1),
+    ('heart_disease', 'Heart Disease', None),
+    ('smoking_history', 'Smoking History', None),
+    ('hypertension', 'Hypertension', None),
+)
+app.jinja_env.globals['DIAGNOSIS_ROWS'] = DIAGNOSIS_ROWS
+
+# The stylesheet is served from static/ and cached by the browser; its URL carries a hash of
+# the file so a changed stylesheet is fetched again
+with open(os.path.join(app.static_folder, 'kiosk.css'), 'rb') as f:
+    app.jinja_env.globals['kiosk_css_version'] = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+@app.after_request
+def cache_static_assets(response):
+    if request.endpoint == 'static' and request.args.get('v'):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+# Compile the template once; render_template_string would re-parse it on every call
+page_template = app.jinja_env.from_string(html_page)
+
+# ==========================
+# Chart Data
+# ==========================
+COLOR_HEX = {'green': '#68D391', 'orange': '#F6AD55', 'black': '#2D3748'}
+RISK_PROFILE_KEYS = ['bmi', 'glucose', 'hba1c', 'hypertension', 'heart_disease', 'smoking_history']
+STATUS_LABELS = [('Age', 'age'), ('BMI', 'bmi'), ('Blood Glucose', 'glucose'), ('HbA1c', 'hba1c'),
+                 ('Hypertension', 'hypertension'), ('Heart Disease', 'heart_disease'), ('Smoking History', 'smoking_history')]
+
+def chart_color(color):
+    return COLOR_HEX.get(color, '#FC8181')
+
+def build_risk_profile(diagnosis):
+    """
+    Radar chart values (as % of the normal/diagnostic threshold) and point colours.
+    """
+    profile = [0] * len(RISK_PROFILE_KEYS)
+    if 'bmi' in diagnosis:
+        profile[0] = round(diagnosis['bmi']['value'] / 40 * 100, 1)
+    if 'glucose' in diagnosis:
+        normal_max = 7.7 if diagnosis['glucose']['category'] == 'Random' else 6.0
+        profile[1] = round(diagnosis['glucose']['value_mg'] / (normal_max * 18.0) * 100, 1)
+    if 'hba1c' in diagnosis:
+        profile[2] = round(diagnosis['hba1c']['value_percent'] / 6.3 * 100, 1)
+    if 'hypertension' in diagnosis and diagnosis['hypertension']['status'] in ['Hypertension Stage 1', 'Hypertension Stage 2']:
+        profile[3] = 100
+    if 'heart_disease' in diagnosis and diagnosis['heart_disease']['status'] == 'Yes':
+        profile[4] = 100
+    if 'smoking_history' in diagnosis:
+        status = diagnosis['smoking_history']['status']
+        profile[5] = 0 if status == 'Never' else 50 if status in ['Former', 'Not Current'] else 100
+
+    colors = [chart_color(diagnosis[key]['color'] if key in diagnosis else 'black') for key in RISK_PROFILE_KEYS]
+    return profile, colors
+
+def build_chart_data(diagnosis):
+    """
+    Everything the result charts need, as a JSON-serialisable dict.
+    """
+    def color_of(key):
+        return chart_color(diagnosis[key]['color'] if key in diagnosis else 'black')
+
+    risk_profile, risk_colors = build_risk_profile(diagnosis)
+    glucose_normal_max = 0
+    if 'glucose' in diagnosis:
+        glucose_normal_max = (7.7 if diagnosis['glucose']['category'] == 'Random' else 6.0) * 18.0
+
+    return {
+        'vitals': {
+            'values': [
+                round(diagnosis['bmi']['value'], 1) if 'bmi' in diagnosis else 0,
+                round(diagnosis['glucose']['value_mg'], 1) if 'glucose' in diagnosis else 0,
+                round(diagnosis['hba1c']['value_percent'], 1) if 'hba1c' in diagnosis else 0,
+            ],
+            'colors': [color_of('bmi'), color_of('glucose'), color_of('hba1c')],
+            'glucoseNormalMax': glucose_normal_max,
+        },
+        'riskProfile': {'values': risk_profile, 'colors': risk_colors},
+        'riskFactor': {'colors': [color_of('hba1c'), color_of('glucose'), '#2D3748', color_of('bmi'), color_of('hypertension')]},
+        'status': {label: diagnosis[key]['status'] if key in diagnosis else 'Not Available' for label, key in STATUS_LABELS},
+    }
+
+@lru_cache(maxsize=256)
+def _render_cached(result, color, explanation, error, diagnosis_json, diabetes_prob):
+    diagnosis = json.loads(diagnosis_json)
+    chart_data = build_chart_data(diagnosis)
+    risk_level = classify_risk(diabetes_prob) if diabetes_prob is not None else None
+    return render_template(page_template, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis, diabetes_prob=diabetes_prob, risk_level=risk_level, chart_data=chart_data)
+
+def render_page(result=None, color=None, explanation=None, error=None, diagnosis=None, diabetes_prob=None):
+    """
+    Render the page, reusing the HTML for identical results and tagging it with an ETag.
+    """
+    diagnosis_json = json.dumps(diagnosis or {}, sort_keys=True)
+    response = make_response(_render_cached(result, color, explanation, error, diagnosis_json, diabetes_prob))
+    response.add_etag()
+    return response.make_conditional(request)
+
 # ==========================
 # Routes
 # ==========================
@@ -1224,50 +1464,39 @@ html_page = """
 def home():
     result, color, explanation, error = None, None, None, None
     diagnosis = {}
+    diabetes_prob = None
+    prompt_id = None
 
     if request.method == "POST":
         if 'file' not in request.files:
             error = "No file part"
-            return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_page(result, color, explanation, error, diagnosis)
 
         file = request.files['file']
         if file.filename == '':
             error = "No selected file"
-            return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_page(result, color, explanation, error, diagnosis)
 
         heart_disease = request.form.get('heart_disease')
         smoking_history = request.form.get('smoking_history')
 
         if not heart_disease or not smoking_history:
             error = "Please select options for Heart Disease and Smoking History."
-            return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+            return render_page(result, color, explanation, error, diagnosis)
 
         if file and allowed_file(file.filename):
-            file.seek(0, 2)
-            file_size = file.tell()
-            if file_size > app.config['MAX_CONTENT_LENGTH']:
-                error = "File too large. Maximum size is 10MB."
-                return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
-            file.seek(0)  # Reset file pointer
-
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-
-            logger.info(f"Processing file: {filename}")
+            # Parse the upload straight from memory; MAX_CONTENT_LENGTH already caps the request size
+            pdf_bytes = file.read()
+            # The name is only logged (repr keeps control characters out of the log); nothing is written to disk
+            logger.info(f"Processing file: {file.filename!r}")
 
             try:
                 # Extract text from PDF
-                text = ''
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + '\n'
+                text = get_pdf_text(pdf_bytes)
 
                 if not text.strip():
                     error = "No text found in the PDF."
-                    return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+                    return render_page(result, color, explanation, error, diagnosis)
 
                 # Add user inputs to diagnosis
                 diagnosis['heart_disease'] = {
@@ -1283,16 +1512,18 @@ def home():
                     'color': 'black' if smoking_history == 'No Info' else 'green' if smoking_history == 'never' else 'orange' if smoking_history in ['former', 'not current'] else 'red'
                 }
 
+                fields = scan_report_fields(text)
+
                 # Parse age
-                age_match = re.search(r'(age|Age|AGE)\s*[:=]?\s*(\d+\.?\d*)\s*(years|Years|YEARS)?', text, re.IGNORECASE)
+                age_match = fields.get('age')
                 if age_match:
-                    age_value = float(age_match.group(2))
+                    age_value = float(age_match.group('age_value'))
                     diagnosis['age'] = {'value': age_value, 'unit': 'Years', 'status': '', 'color': ''}
 
                 # Parse gender (sex)
-                sex_match = re.search(r'(sex|Sex|SEX|gender|Gender|GENDER)\s*[:=]?\s*(male|female|m|f)', text, re.IGNORECASE)
+                sex_match = fields.get('sex')
                 if sex_match:
-                    sex_value = sex_match.group(2).lower().capitalize()
+                    sex_value = sex_match.group('sex_value').lower()
                     if sex_value in ['m', 'male']:
                         sex_value = 'Male'
                     elif sex_value in ['f', 'female']:
@@ -1300,66 +1531,35 @@ def home():
                     diagnosis['sex'] = {'value': sex_value, 'unit': '', 'status': ' ', 'color': 'black'}
 
                 # Parse BMI
-                bmi_match = re.search(r'(bmi|BMI|Body Mass Index)\s*[:=]?\s*(\d+\.?\d*)\s*(kg/m²|kg/sqm)?', text, re.IGNORECASE)
+                bmi_match = fields.get('bmi')
                 if bmi_match:
-                    bmi_value = float(bmi_match.group(2))
-                    diagnosis['bmi'] = {'value': bmi_value, 'unit': 'kg/m²', 'status': '', 'color': ''}
-                    if bmi_value < 18.5:
-                        diagnosis['bmi']['status'] = 'Underweight'
-                        diagnosis['bmi']['color'] = 'orange'
-                    elif 18.5 <= bmi_value <= 24.9:
-                        diagnosis['bmi']['status'] = 'Normal'
-                        diagnosis['bmi']['color'] = 'green'
-                    elif 25.0 <= bmi_value <= 29.9:
-                        diagnosis['bmi']['status'] = 'Pre-obese'
-                        diagnosis['bmi']['color'] = 'orange'
-                    elif 30.0 <= bmi_value <= 34.9:
-                        diagnosis['bmi']['status'] = 'Obese class I'
-                        diagnosis['bmi']['color'] = 'red'
-                    elif 35.0 <= bmi_value <= 39.9:
-                        diagnosis['bmi']['status'] = 'Obese class II'
-                        diagnosis['bmi']['color'] = 'red'
-                    else:
-                        diagnosis['bmi']['status'] = 'Obese class III'
-                        diagnosis['bmi']['color'] = 'red'
+                    bmi_value = float(bmi_match.group('bmi_value'))
+                    status, status_color = classify_bmi(bmi_value)
+                    diagnosis['bmi'] = {'value': bmi_value, 'unit': 'kg/m²', 'status': status, 'color': status_color}
 
                 # Parse Hypertension (Blood Pressure)
-                bp_match = re.search(r'(blood pressure|Blood Pressure|BLOOD PRESSURE)\s*[:=]?\s*(\d+)\s*/\s*(\d+)\s*mmHg', text, re.IGNORECASE)
+                bp_match = fields.get('bp')
                 if bp_match:
-                    systolic = int(bp_match.group(2))
-                    diastolic = int(bp_match.group(3))
+                    systolic = int(bp_match.group('systolic'))
+                    diastolic = int(bp_match.group('diastolic'))
                     bp_value = f"{systolic}/{diastolic}"
-                    diagnosis['hypertension'] = {'value': bp_value, 'unit': 'mmHg', 'status': '', 'color': ''}
-                    if systolic < 120 and diastolic < 80:
-                        diagnosis['hypertension']['status'] = 'Normal'
-                        diagnosis['hypertension']['color'] = 'green'
-                    elif (120 <= systolic <= 139 or 80 <= diastolic <= 89):
-                        diagnosis['hypertension']['status'] = 'Elevated/Prehypertension'
-                        diagnosis['hypertension']['color'] = 'orange'
-                    elif (140 <= systolic <= 159 or 90 <= diastolic <= 99):
-                        diagnosis['hypertension']['status'] = 'Hypertension Stage 1'
-                        diagnosis['hypertension']['color'] = 'red'
-                    else:
-                        diagnosis['hypertension']['status'] = 'Hypertension Stage 2'
-                        diagnosis['hypertension']['color'] = 'red'
+                    status, status_color = classify_bp(systolic, diastolic)
+                    diagnosis['hypertension'] = {'value': bp_value, 'unit': 'mmHg', 'status': status, 'color': status_color}
 
                 # Find specimen type for glucose
-                specimen_match = re.search(r'(Specimen Type|specimen type|fasting|Fasting|normal|NORMAL)\s*[:=]?\s*(fasting|random|normal)', text, re.IGNORECASE)
+                specimen_match = fields.get('specimen')
                 specimen_category = None
                 if specimen_match:
-                    specimen_category = specimen_match.group(2).capitalize()
+                    specimen_category = specimen_match.group('specimen_value').capitalize()
                     if specimen_category == 'Normal':
                         specimen_category = 'Random'  # Map 'Normal' to 'Random' for glucose context
                 else:
                     specimen_category = 'Random'  # Default to Random per request
 
                 # Parse blood glucose
-                glucose_matches = re.findall(
-                    r'(fasting|random)?\s*(?:glucose|blood sugar|fasting blood glucose|fbs|random blood glucose|rbs)\s*[:=]?\s*(\d+\.?\d*)\s*(mmol/l|mmol/L|mg/dl|mg/dL)?',
-                    text, re.IGNORECASE
-                )
-                if glucose_matches:
-                    glucose_context, glucose_str, unit_str = glucose_matches[0]
+                glucose_match = fields.get('glucose')
+                if glucose_match:
+                    glucose_context, glucose_str, unit_str = glucose_match.group('glucose_context', 'glucose_value', 'glucose_unit')
                     original_value = float(glucose_str)
                     original_unit = unit_str.lower() if unit_str else 'mmol/l'  # Default to mmol/L
 
@@ -1373,48 +1573,19 @@ def home():
                     glucose_context = (glucose_context or '').lower()
                     category = specimen_category or (glucose_context.capitalize() if glucose_context else 'Random')
 
+                    status, status_color = classify_glucose(glucose_value_mmol, category)
                     diagnosis['glucose'] = {
                         'value_mmol': glucose_value_mmol, 
                         'value_mg': glucose_value_mg, 
                         'category': category,
-                        'status': '',
-                        'color': ''
+                        'status': status,
+                        'color': status_color
                     }
 
-                    if category == 'Fasting':
-                        if glucose_value_mmol < 3.9:
-                            diagnosis['glucose']['status'] = 'Hypoglycemia'
-                            diagnosis['glucose']['color'] = 'red'
-                        elif 3.9 <= glucose_value_mmol <= 6.0:
-                            diagnosis['glucose']['status'] = 'Normal'
-                            diagnosis['glucose']['color'] = 'green'
-                        elif 6.1 <= glucose_value_mmol <= 6.9:
-                            diagnosis['glucose']['status'] = 'Prediabetes'
-                            diagnosis['glucose']['color'] = 'orange'
-                        else:
-                            diagnosis['glucose']['status'] = 'Diabetes'
-                            diagnosis['glucose']['color'] = 'red'
-                    else:  # Random (including default)
-                        if glucose_value_mmol < 3.9:
-                            diagnosis['glucose']['status'] = 'Hypoglycemia'
-                            diagnosis['glucose']['color'] = 'red'
-                        elif 3.9 <= glucose_value_mmol <= 7.7:
-                            diagnosis['glucose']['status'] = 'Normal'
-                            diagnosis['glucose']['color'] = 'green'
-                        elif 7.8 <= glucose_value_mmol <= 11.0:
-                            diagnosis['glucose']['status'] = 'Prediabetes'
-                            diagnosis['glucose']['color'] = 'orange'
-                        else:
-                            diagnosis['glucose']['status'] = 'Diabetes'
-                            diagnosis['glucose']['color'] = 'red'
-
                 # Parse HbA1c
-                hba1c_matches = re.findall(
-                    r'(?:hba1c|a1c|glycosylated hemoglobin)\s*[:=]?\s*(\d+\.?\d*)\s*(%|mmol/mol|mmol/MOL)?',
-                    text, re.IGNORECASE
-                )
-                if hba1c_matches:
-                    hba1c_str, unit_str = hba1c_matches[0]
+                hba1c_match = fields.get('hba1c')
+                if hba1c_match:
+                    hba1c_str, unit_str = hba1c_match.group('hba1c_value', 'hba1c_unit')
                     original_value = float(hba1c_str)
                     original_unit = unit_str.lower() if unit_str else '%'  # Default to %
 
@@ -1425,29 +1596,20 @@ def home():
                         hba1c_value_mmol = original_value
                         hba1c_value_percent = round((original_value + 23.5) / 10.93, 1)
 
+                    status, status_color = classify_hba1c(hba1c_value_percent)
                     diagnosis['hba1c'] = {
                         'value_percent': hba1c_value_percent, 
                         'value_mmol': hba1c_value_mmol,
-                        'status': '',
-                        'color': ''
+                        'status': status,
+                        'color': status_color
                     }
 
-                    if hba1c_value_percent < 5.7:
-                        diagnosis['hba1c']['status'] = 'Normal'
-                        diagnosis['hba1c']['color'] = 'green'
-                    elif 5.7 <= hba1c_value_percent <= 6.2:
-                        diagnosis['hba1c']['status'] = 'Prediabetes'
-                        diagnosis['hba1c']['color'] = 'orange'
-                    else:
-                        diagnosis['hba1c']['status'] = 'Diabetes'
-                        diagnosis['hba1c']['color'] = 'red'
-
                 # Check for required fields for model prediction
                 required_fields = ['age', 'sex', 'bmi', 'hypertension', 'glucose', 'hba1c']
                 missing = [field for field in required_fields if field not in diagnosis]
                 if missing:
                     error = f"Missing required data in the report for prediction: {', '.join(missing)}. Please ensure the PDF contains age, gender, BMI, blood pressure, blood glucose level, and HbA1c level."
-                    return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+                    return render_page(result, color, explanation, error, diagnosis)
 
                 # Prepare input for model
                 gender = diagnosis['sex']['value']
@@ -1458,28 +1620,25 @@ def home():
                 HbA1c_level = diagnosis['hba1c']['value_percent']
                 blood_glucose_level = diagnosis['glucose']['value_mg']
 
-                input_df = pd.DataFrame({
-                    'gender': [gender],
-                    'age': [age],
-                    'hypertension': [hypertension_val],
-                    'heart_disease': [heart_disease_val],
-                    'smoking_history': [smoking_history],
-                    'bmi': [bmi],
-                    'HbA1c_level': [HbA1c_level],
-                    'blood_glucose_level': [blood_glucose_level]
-                })
-                logger.debug(f"Input DataFrame: {input_df.to_dict()}")
-
-                # Preprocess input
-                input_preprocessed = preprocessor.transform(input_df)
-                logger.debug(f"Preprocessed input shape: {input_preprocessed.shape}")
-
-                # Predict
-                sample_pred_proba = model.predict(input_preprocessed, verbose=0)
-                sample_pred = (sample_pred_proba > 0.5).astype(int)[0]
-                prob = sample_pred_proba[0][0] * 100
+                record = {
+                    'gender': gender,
+                    'age': age,
+                    'hypertension': hypertension_val,
+                    'heart_disease': heart_disease_val,
+                    'smoking_history': smoking_history,
+                    'bmi': bmi,
+                    'HbA1c_level': HbA1c_level,
+                    'blood_glucose_level': blood_glucose_level
+                }
+                logger.debug("Input record: %s", record)  # formatted only when DEBUG is on
+
+                # Preprocess and predict
+                sample_pred_proba = predict_record(tuple(record.items()))
+                sample_pred = int(sample_pred_proba > 0.5)
+                prob = sample_pred_proba * 100
+                diabetes_prob = round(float(prob), 1)
                 risk = "Diabetes" if sample_pred == 1 else "Normal"
-                logger.debug(f"Prediction: {risk}, Probability: {prob:.1f}%")
+                logger.debug("Prediction: %s, Probability: %.1f%%", risk, prob)
 
                 # Format result and explanation
                 result = f"Prediction: {risk} (Probability of Diabetes: {prob:.1f}%)"
@@ -1490,62 +1649,83 @@ def home():
                 else:
                     explanation += "All vitals within normal ranges. Maintain healthy lifestyle."
 
+                # Save for streaming later, keyed by an id the browser keeps in a cookie
+                prompt = f"""
+                    You are a medical assistant AI. Analyze the following patient data and provide a clear explanation + lifestyle recommendations in simple language.
+
+                Patient Information:
+                - Gender: {gender}
+                - Age: {age}
+                - BMI: {bmi}
+                - Blood Pressure: {diagnosis['hypertension']['value']}
+                - HbA1c: {HbA1c_level}%
+                - Blood Glucose: {blood_glucose_level} mg/dL
+                - Heart Disease: {heart_disease}
+                - Smoking History: {smoking_history}
+
+                Prediction result: {risk} (Probability: {prob:.1f}%)
+
+                Based on Malaysian clinical guidelines, explain the risk status and give personalized health advice.
+                """
+                prompt_id = secrets.token_urlsafe(16)
+                with prompt_store_lock:
+                    prompt_store[prompt_id] = prompt
+
             except Exception as e:
                 logger.error(f"Error during processing: {str(e)}")
                 error = f"Error processing PDF or prediction: {str(e)}"
-            finally:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
         else:
             error = "Invalid file type. Please upload a PDF."
 
-        # Save for streaming later
-        global latest_prompt
-        latest_prompt = f"""
-            You are a medical assistant AI. Analyze the following patient data and provide a clear explanation + lifestyle recommendations in simple language.
+    response = render_page(result, color, explanation, error, diagnosis, diabetes_prob)
+    if prompt_id:
+        response.set_cookie('prompt_id', prompt_id, max_age=PROMPT_TTL, httponly=True, samesite='Lax')
+    return response
 
-        Patient Information:
-        - Gender: {gender}
-        - Age: {age}
-        - BMI: {bmi}
-        - Blood Pressure: {diagnosis['hypertension']['value']}
-        - HbA1c: {HbA1c_level}%
-        - Blood Glucose: {blood_glucose_level} mg/dL
-        - Heart Disease: {heart_disease}
-        - Smoking History: {smoking_history}
-
-        Prediction result: {risk} (Probability: {prob:.1f}%)
-
-        Based on Malaysian clinical guidelines, explain the risk status and give personalized health advice.
-        """
-
-    return render_template_string(html_page, result=result, color=color, explanation=explanation, error=error, diagnosis=diagnosis)
+@app.errorhandler(RequestEntityTooLarge)
+def file_too_large(e):
+    """
+    Werkzeug aborts oversize uploads while parsing the form; show the usual page instead of a bare 413.
+    """
+    response = render_page(error="File too large. Maximum size is 10MB.")
+    response.status_code = 413
+    return response
 
 @app.route('/stream_recommendation')
 def stream_recommendation():
+    prompt = None
+    prompt_id = request.cookies.get('prompt_id')
+    if prompt_id:
+        # Read, not popped: an EventSource reconnect needs the prompt again until 'end' is sent
+        with prompt_store_lock:
+            prompt = prompt_store.get(prompt_id)
+
     def generate():
-        global latest_prompt
-        if not latest_prompt:
+        if not prompt:
             yield f"data: {json.dumps({'type': 'error', 'text': 'No prompt available. Please upload a report first.'})}\n\n"
             return
 
         try:
-            for chunk in ollama.chat(
-                model="llama3", 
-                messages=[{"role": "user", "content": latest_prompt}],
-                stream=True,
-            ):
-                if "message" in chunk and "content" in chunk["message"]:
-                    word = chunk["message"]["content"]
-                    yield f"data: {json.dumps({'type': 'result', 'text': word})}\n\n"
+            # Reconnect hint for EventSource, then comment lines keep proxies from timing out the idle stream
+            yield 'retry: 5000\n\n'
+            for word in with_keepalive(stream_from_ollama(prompt, model="llama3")):
+                if word is None:
+                    yield ': keepalive\n\n'
+                    continue
+                # Only the token text needs escaping; the envelope around it never changes
+                yield 'data: {"type": "result", "text": ' + orjson.dumps(word).decode() + '}\n\n'
 
             # End of stream
+            with prompt_store_lock:
+                prompt_store.pop(prompt_id, None)
             yield f"data: {json.dumps({'type': 'end'})}\n\n"
 
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'text': str(e)})}\n\n"
 
-    return Response(stream_with_context(generate()), mimetype="text/event-stream")
+    # Each yielded event is written straight to the socket; keep proxies from buffering it
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from flask import Flask, render_template_string, request, Response
+from flask import Flask, render_template, request, Response
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -9,6 +9,7 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
 import requests
 import json
+from functools import lru_cache
 
 
 # ==========================
@@ -163,6 +164,9 @@ html_page = """
 </html>
 """
 
+# Compile the template once; render_template_string would re-parse it on every request
+page_template = app.jinja_env.from_string(html_page)
+
 # ==========================
 # LLM Integration (Ollama)
 # ==========================
@@ -187,11 +191,22 @@ def generate_recommendation(age, hr, spo2, bp, temp, diagnosis, confidence):
     return response
 
 
+@lru_cache(maxsize=1)
+def idle_page():
+    """
+    The page before any submission is the same for everyone, so it is rendered only once.
+    """
+    return render_template(page_template, result=None, color=None, explanation=None, recommendation=None)
+
+
 # ==========================
 # Routes
 # ==========================
 @app.route("/", methods=["GET", "POST"])
 def home():
+    if request.method == "GET":
+        return idle_page(), 200, {'Cache-Control': 'public, max-age=300'}
+
     result, color, explanation, recommendation = None, None, None, None
     classes = ["Normal", "Cardiovascular Risk", "Respiratory Issue", "Fever/Infection"]
     colors = ["green", "red", "orange", "purple"]
@@ -210,7 +225,7 @@ def home():
             input_data[0][0] *= 1.1
 
         input_scaled = scaler.transform(input_data)
-        prediction = model.predict(input_scaled, verbose=0)[0]
+        prediction = model(np.asarray(input_scaled, dtype=np.float32), training=False).numpy()[0]
         class_idx = np.argmax(prediction)
         confidence = prediction[class_idx] * 100
 
@@ -228,8 +243,8 @@ def home():
         #Generate LLM recommendation
         recommendation = generate_recommendation(age, hr, spo2, bp, temp, result, confidence)
 
-    return render_template_string(
-        html_page,
+    return render_template(
+        page_template,
         result=result,
         color=color,
         explanation=explanation,
@@ -0,0 +1,14 @@
+import gzip
+
+from integrate import app
+
+
+def test_stylesheet_gzip_only_client():
+    """A client without brotli support still gets a compressed stylesheet."""
+    client = app.test_client()
+    plain = client.get('/static/kiosk.css')
+    response = client.get('/static/kiosk.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers.get('Content-Encoding') == 'gzip'
+    body = response.get_data()
+    assert len(body) < len(plain.get_data())
+    assert gzip.decompress(body) == plain.get_data()